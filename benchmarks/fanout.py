@@ -0,0 +1,266 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" In-process fan-out micro-benchmarks
+
+Drives Connections.publish_notification and Connection.process_message with fake
+websocket handlers (no network, no bus) over a matrix of parameters.
+
+Usage:
+    python -m benchmarks.fanout --output results.json
+    python -m benchmarks.fanout --quick --compare results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import sys
+import time
+import typing
+
+from foris_ws import __version__
+from foris_ws.connection import Connection, Connections
+
+MODULES = ["module%02d" % i for i in range(32)]
+
+
+class FakeHandler:
+    """ Stands in for websockets protocol, it only counts what would be sent
+    """
+
+    __slots__ = ("messages", "bytes")
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    async def send(self, msg: str):
+        self.messages += 1
+        self.bytes += len(msg)
+
+
+def make_notification(module: str, payload_size: int) -> dict:
+    return {
+        "module": module,
+        "action": "benchmark",
+        "kind": "notification",
+        "data": {"payload": "x" * payload_size},
+    }
+
+
+async def _prepare(connection_count: int, modules_per_connection: int):
+    connections = Connections()
+    handlers = []
+    for i in range(connection_count):
+        handler = FakeHandler()
+        handlers.append(handler)
+        client_id = await connections.register_connection(handler)
+        # spread the subscriptions so that modules have different numbers of subscribers
+        modules = [MODULES[(i + j) % len(MODULES)] for j in range(modules_per_connection)]
+        connections._connections[client_id]._subscribe(modules)
+    return connections, handlers
+
+
+async def _wait_for_delivery(handlers: typing.List[FakeHandler], expected: int):
+    while sum(e.messages for e in handlers) < expected:
+        await asyncio.sleep(0)
+
+
+async def bench_publish(
+    connection_count: int,
+    modules_per_connection: int,
+    payload_size: int,
+    rate: typing.Optional[float],
+    notifications: int,
+) -> dict:
+    """ Publishes notifications and waits till they are delivered to all subscribers
+
+    :param rate: notifications per second (None = as fast as possible)
+    """
+    connections, handlers = await _prepare(connection_count, modules_per_connection)
+    subscribers = connections.subscription_counts()
+    prepared = [
+        make_notification(MODULES[i % len(MODULES)], payload_size) for i in range(notifications)
+    ]
+    expected = sum(subscribers.get(e["module"], 0) for e in prepared)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i, notification in enumerate(prepared):
+        connections.publish_notification("benchmark", notification["module"], notification)
+        if rate:
+            delay = wall_start + (i + 1) / rate - time.perf_counter()
+            await asyncio.sleep(max(delay, 0))
+        elif i % 64 == 63:
+            await asyncio.sleep(0)  # let the loop process the fan-out
+    await _wait_for_delivery(handlers, expected)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "benchmark": "publish",
+        "connections": connection_count,
+        "modules_per_connection": modules_per_connection,
+        "payload_size": payload_size,
+        "rate": rate,
+        "notifications": notifications,
+        "messages": expected,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "notifications_per_s": notifications / wall,
+        "messages_per_s": expected / wall if expected else 0.0,
+        "cpu_per_message_us": cpu / expected * 1e6 if expected else 0.0,
+    }
+
+
+async def bench_process_message(modules_per_connection: int, operations: int) -> dict:
+    """ Alternates subscribe and unsubscribe requests on a single connection
+    """
+    connection = Connection(1, FakeHandler())
+    modules = MODULES[:modules_per_connection]
+    requests = [
+        json.dumps({"action": action, "params": modules}) for action in ("subscribe", "unsubscribe")
+    ]
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(operations):
+        await connection.process_message(requests[i % 2])
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "benchmark": "process_message",
+        "modules_per_connection": modules_per_connection,
+        "operations": operations,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "operations_per_s": operations / wall,
+        "cpu_per_message_us": cpu / operations * 1e6,
+    }
+
+
+def matrix(quick: bool) -> typing.Dict[str, list]:
+    if quick:
+        return {
+            "connections": [10, 100],
+            "modules_per_connection": [1, 8],
+            "payload_size": [100, 10000],
+            "rate": [None],
+        }
+    return {
+        "connections": [10, 100, 1000],
+        "modules_per_connection": [1, 8, 32],
+        "payload_size": [100, 1000, 10000],
+        "rate": [None, 1000.0],
+    }
+
+
+def key(result: dict) -> typing.Tuple:
+    """ Identifies the benchmark case (used to compare runs)
+    """
+    return tuple(
+        result.get(e)
+        for e in ("benchmark", "connections", "modules_per_connection", "payload_size", "rate")
+    )
+
+
+def run(quick: bool, notifications: int) -> typing.List[dict]:
+    results = []
+    params = matrix(quick)
+    for connection_count, modules, payload_size, rate in itertools.product(
+        params["connections"],
+        params["modules_per_connection"],
+        params["payload_size"],
+        params["rate"],
+    ):
+        result = asyncio.run(
+            bench_publish(connection_count, modules, payload_size, rate, notifications)
+        )
+        results.append(result)
+        print(
+            "publish conns=%(connections)d modules=%(modules_per_connection)d "
+            "payload=%(payload_size)d rate=%(rate)s: %(messages_per_s).0f msg/s "
+            "%(cpu_per_message_us).2f us cpu/msg" % result,
+            file=sys.stderr,
+        )
+    for modules in params["modules_per_connection"]:
+        result = asyncio.run(bench_process_message(modules, notifications * 10))
+        results.append(result)
+        print(
+            "process_message modules=%(modules_per_connection)d: %(operations_per_s).0f ops/s "
+            "%(cpu_per_message_us).2f us cpu/msg" % result,
+            file=sys.stderr,
+        )
+    return results
+
+
+def compare(results: typing.List[dict], baseline: typing.List[dict], threshold: float) -> int:
+    """ Compares cpu per message with the baseline
+
+    :returns: number of regressions
+    """
+    baseline_map = {key(e): e for e in baseline}
+    regressions = 0
+    for result in results:
+        old = baseline_map.get(key(result))
+        if not old or not old["cpu_per_message_us"]:
+            continue
+        change = result["cpu_per_message_us"] / old["cpu_per_message_us"] - 1
+        if change > threshold:
+            regressions += 1
+            print("REGRESSION %s: %+.1f%% cpu/msg" % (key(result), change * 100), file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.fanout")
+    parser.add_argument("--quick", action="store_true", default=False, help="use a smaller matrix")
+    parser.add_argument("--notifications", type=int, default=200, help="notifications per case")
+    parser.add_argument("--output", type=str, default=None, help="write json results to file")
+    parser.add_argument("--compare", type=str, default=None, help="baseline json results")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed cpu/msg growth against baseline"
+    )
+    options = parser.parse_args()
+
+    results = run(options.quick, options.notifications)
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Handshake and authentication throughput benchmark
+
+Runs the websocket server in-process and opens (and immediately closes) connections
+with growing concurrency for each authentication method. External services are replaced
+by stubs - ubus session checks are answered by a stub helper process and filesystem
+sessions are generated into a temporary directory.
+
+Usage:
+    python -m benchmarks.handshake --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import websockets
+
+from cachelib.file import FileSystemCache
+
+from foris_ws import __version__
+from foris_ws.authentication import filesystem, none, ubus, ubus_client
+from foris_ws.authentication.chain import AuthenticationChain
+from foris_ws.loop_monitor import percentile
+from foris_ws.ws_handling import connection_handler, make_process_request
+
+HOST = "127.0.0.1"
+
+# grants access to all sessions except the ones starting with "bad"
+STUB_UBUS_HELPER = """
+import json, sys
+for line in sys.stdin:
+    session = json.loads(line)["ubus_rpc_session"]
+    print(json.dumps({"access": not session.startswith("bad")}), flush=True)
+"""
+
+
+class StubUbusClient(ubus_client.UbusSessionClient):
+    def _start(self):
+        return subprocess.Popen(
+            [sys.executable, "-c", STUB_UBUS_HELPER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+
+def prepare_methods(sessions_dir: str, session_count: int) -> typing.Dict[str, typing.Callable]:
+    fs_cache = FileSystemCache(sessions_dir, threshold=session_count * 2)
+    for i in range(session_count):
+        fs_cache.set("session:session%d" % i, {"logged": True})
+    filesystem.session_store = filesystem.SessionStore(sessions_dir, max_size=session_count)
+    ubus_client._client = StubUbusClient()
+
+    def ubus_uncached(path, request_headers):
+        ubus.session_cache.configure(0, 0, 0)
+        return ubus.authenticate(path, request_headers)
+
+    def ubus_cached(path, request_headers):
+        if not ubus.session_cache.enabled:
+            ubus.session_cache.configure(60, 2, session_count)
+        return ubus.authenticate(path, request_headers)
+
+    # keep the module so the method name in metrics is correct
+    ubus_uncached.__module__ = ubus_cached.__module__ = ubus.__name__
+
+    return {
+        "none": none.authenticate,
+        "filesystem": filesystem.authenticate,
+        "ubus": ubus_uncached,
+        "ubus-cached": ubus_cached,
+    }
+
+
+async def handshake(port: int, session: str) -> float:
+    start = time.perf_counter()
+    async with websockets.connect(
+        "ws://%s:%d/" % (HOST, port),
+        extra_headers=[("Cookie", "foris.ws.session=%s; session=%s" % (session, session))],
+    ):
+        pass
+    return time.perf_counter() - start
+
+
+async def bench_method(
+    method: typing.Callable, concurrency: int, handshakes: int, session_count: int, port: int
+) -> dict:
+    chain = AuthenticationChain([method], max_workers=4)
+    server = await websockets.serve(
+        connection_handler, HOST, port, process_request=make_process_request(chain.authenticate)
+    )
+    rng = random.Random(0)
+    sessions = ["session%d" % rng.randrange(session_count) for _ in range(handshakes)]
+    latencies: typing.List[float] = []
+    failures = 0
+
+    async def worker(queue: typing.List[str]):
+        nonlocal failures
+        while queue:
+            session = queue.pop()
+            try:
+                latencies.append(await handshake(port, session))
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(sessions) for _ in range(concurrency)])
+    duration = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "handshakes": handshakes,
+        "failures": failures,
+        "handshakes_per_s": len(latencies) / duration,
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_p99_s": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.handshake")
+    parser.add_argument(
+        "--methods", nargs="+", default=["none", "filesystem", "ubus", "ubus-cached"]
+    )
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--handshakes", type=int, default=500, help="handshakes per case")
+    parser.add_argument("--sessions", type=int, default=2000, help="number of generated sessions")
+    parser.add_argument("--port", type=int, default=18889)
+    parser.add_argument("--output", type=str, default=None, help="write json results to file")
+    options = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="foris-ws-sessions-") as sessions_dir:
+        methods = prepare_methods(sessions_dir, options.sessions)
+        for name in options.methods:
+            for concurrency in options.concurrency:
+                result = asyncio.run(
+                    bench_method(
+                        methods[name],
+                        concurrency,
+                        options.handshakes,
+                        options.sessions,
+                        options.port,
+                    )
+                )
+                result["method"] = name
+                results.append(result)
+                print(
+                    "%(method)s concurrency=%(concurrency)d: %(handshakes_per_s).0f handshakes/s "
+                    "p50=%(latency_p50_s).4fs p99=%(latency_p99_s).4fs failures=%(failures)d"
+                    % result,
+                    file=sys.stderr,
+                )
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
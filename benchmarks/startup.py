@@ -0,0 +1,175 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Startup time benchmark
+
+Measures how long it takes to import foris_ws.__main__ (using python -X importtime)
+and how long it takes from the process start till the websocket server accepts
+connections (using the replay bus with an empty recording, so no real bus is needed).
+
+Usage:
+    python -m benchmarks.startup --output results.json
+    python -m benchmarks.startup --budget benchmarks/startup_budget.json
+
+Timings depend on the machine, so the budget is checked only here (not in the tests).
+"""
+
+import argparse
+import json
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from foris_ws import __version__
+
+HOST = "127.0.0.1"
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\S+)$")
+
+
+def measure_import(module: str = "foris_ws.__main__") -> float:
+    """ Imports the module in a fresh interpreter
+
+    :param module: module to be imported
+    :returns: cumulative import time of the module in seconds
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+    for line in output.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000000
+    raise RuntimeError("Import time of %s not found in the output" % module)
+
+
+def imported_modules(module: str = "foris_ws.__main__") -> typing.List[str]:
+    """ Lists modules which are loaded after the module is imported in a fresh interpreter
+    """
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys; import %s; print(json.dumps(sorted(sys.modules)))" % module,
+        ],
+        universal_newlines=True,
+    )
+    return json.loads(output)
+
+
+def measure_listen(port: int, timeout: float = 10.0) -> float:
+    """ Starts the server and waits till it accepts connections
+
+    :param port: port of the websocket server
+    :param timeout: maximal time to wait
+    :returns: time from the process start till the port is opened in seconds
+    """
+    with tempfile.NamedTemporaryFile(suffix=".jsonl") as recording:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "foris_ws",
+                "-a",
+                "none",
+                "--host",
+                HOST,
+                "--port",
+                str(port),
+                "replay",
+                "--file",
+                recording.name,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                try:
+                    with socket.create_connection((HOST, port), timeout=0.1):
+                        return time.perf_counter() - start
+                except OSError:
+                    time.sleep(0.005)
+            raise RuntimeError("Server did not start within %.1fs" % timeout)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=10, help="number of measurements")
+    parser.add_argument("--port", type=int, default=18890)
+    parser.add_argument("--output", type=str, default=None, help="write json results to file")
+    parser.add_argument(
+        "--budget", type=str, default=None, help="exit with 1 when the budget (json) is exceeded"
+    )
+    options = parser.parse_args()
+
+    import_times = [measure_import() for _ in range(options.runs)]
+    listen_times = [measure_listen(options.port) for _ in range(options.runs)]
+    result = {
+        "import_median_s": statistics.median(import_times),
+        "import_min_s": min(import_times),
+        "listen_median_s": statistics.median(listen_times),
+        "listen_min_s": min(listen_times),
+    }
+    print(
+        "import: median=%(import_median_s).4fs min=%(import_min_s).4fs "
+        "listen: median=%(listen_median_s).4fs min=%(listen_min_s).4fs" % result,
+        file=sys.stderr,
+    )
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": result,
+    }
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if options.budget:
+        with open(options.budget) as f:
+            budget = json.load(f)
+        exceeded = [
+            key
+            for key in ("import_median_s", "listen_median_s")
+            if key in budget and result[key] > budget[key]
+        ]
+        if exceeded:
+            print("Budget exceeded: %s" % ", ".join(exceeded), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2018-2019, 2021 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2018-2019, 2021, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -17,60 +17,254 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 #
 
-import asyncio
 import argparse
 import logging
 import os
 import typing
 import re
-import signal
-import websockets
-import importlib
-
 
 from . import __version__
-from .bus_listener import make_bus_listener
-from .ws_handling import connection_handler as ws_connection_handler
+
+# only the modules which are necessary to parse the arguments are imported here
+# (the rest is imported in main() according to the chosen bus and authentication)
 
 logger = logging.getLogger(__name__)
 
+AUTH_METHODS: typing.List[str] = ["none", "ubus", "filesystem"]
+LOG_LEVELS: typing.List[str] = ["debug", "info", "warning", "error"]
 
-def _extend_choices(names: typing.List[str], module_name: str, target_list: typing.List[str]):
-    try:
-        if importlib.util.find_spec(module_name):
-            target_list.extend(names)
-    except ModuleNotFoundError:
-        pass
+# options which have to be set either on the command line or in the config file
+REQUIRED_OPTIONS: typing.List[str] = ["authentication", "host", "port"]
 
+# python modules which need to be installed for the bus / authentication method
+REQUIRED_MODULES: typing.Dict[str, str] = {
+    "ubus": "ubus",
+    "mqtt": "paho.mqtt.client",
+    "filesystem": "cachelib",
+}
 
-available_buses: typing.List[str] = ["unix-socket"]
-_extend_choices(["ubus"], "ubus", available_buses)
-_extend_choices(["mqtt"], "paho.mqtt.client", available_buses)
 
+def _check_available(parser: argparse.ArgumentParser, name: str):
+    """ Exits with an error when a python module needed by the bus / auth method is missing
+    """
+    import importlib.util
 
-auth_choices: typing.List[str] = ["none"]
-_extend_choices(["ubus"], "ubus", auth_choices)
-_extend_choices(["filesystem"], "cachelib", auth_choices)
+    module_name = REQUIRED_MODULES.get(name)
+    if module_name is None:
+        return
+    try:
+        found = importlib.util.find_spec(module_name) is not None
+    except ModuleNotFoundError:
+        found = False
+    if not found:
+        parser.error("'%s' is not available (python module '%s' is missing)" % (name, module_name))
 
 
-def main() -> typing.NoReturn:
-    # Parse the command line options
+def parse_priority(value: str) -> typing.Tuple[str, int]:
+    """ Parses MODULE=PRIORITY
+    """
+    module, separator, priority = value.partition("=")
+    try:
+        if module and separator:
+            return module, int(priority)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError("'%s' is not in MODULE=PRIORITY format" % value)
+
+
+def prepare_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="foris-ws")
     parser.add_argument("-d", "--debug", dest="debug", action="store_true", default=False)
     parser.add_argument("--version", action="version", version=__version__)
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        default=None,
+        help="Json file with options (command line options take precedence), "
+        "it is reloaded on SIGHUP.",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=LOG_LEVELS,
+        default="warning",
+        help="Logging level (--debug sets it to debug).",
+    )
 
     parser.add_argument(
         "-a",
         "--authentication",
         type=str,
         nargs="+",
-        choices=auth_choices,
+        choices=AUTH_METHODS,
         help="Which authentication method should be used",
-        required=True,
     )
 
-    parser.add_argument("--host", type=str, help="Hostname of the websocket server.", required=True)
-    parser.add_argument("--port", type=int, help="Port of the websocket server.", required=True)
+    parser.add_argument(
+        "--auth-workers",
+        type=int,
+        default=4,
+        help="Maximal number of authentications which are performed at the same time "
+        "(by each authentication method).",
+    )
+    parser.add_argument(
+        "--auth-concurrent",
+        action="store_true",
+        default=False,
+        help="Try all authentication methods at once and accept the first success.",
+    )
+    parser.add_argument(
+        "--auth-cache-ttl",
+        type=float,
+        default=0.0,
+        help="How long (in seconds) is the granted session access cached (0 = disabled).",
+    )
+    parser.add_argument(
+        "--auth-cache-negative-ttl",
+        type=float,
+        default=0.0,
+        help="How long (in seconds) is the denied session access cached (should be short).",
+    )
+    parser.add_argument(
+        "--auth-cache-size",
+        type=int,
+        default=256,
+        help="Maximal number of sessions kept in the authentication cache.",
+    )
+
+    parser.add_argument(
+        "--revalidate-interval",
+        type=float,
+        default=60.0,
+        help="How often (in seconds) are the sessions of connected clients verified (0 = never).",
+    )
+    parser.add_argument(
+        "--revalidate-max-sessions",
+        type=int,
+        default=16,
+        help="Maximal number of sessions verified during a single revalidation.",
+    )
+
+    parser.add_argument(
+        "--loop-lag-interval",
+        type=float,
+        default=1.0,
+        help="How often (in seconds) is the event loop lag sampled (0 = never).",
+    )
+    parser.add_argument(
+        "--slow-callback-threshold",
+        type=float,
+        default=None,
+        help="Log callbacks and coroutine steps which block the event loop longer (in seconds).",
+    )
+
+    parser.add_argument(
+        "--trace-sample",
+        type=int,
+        default=0,
+        help="Log timings of every n-th notification as json to foris_ws.trace logger (0 = never).",
+    )
+
+    parser.add_argument(
+        "--profile-dir",
+        type=str,
+        default="/tmp",
+        help="Where to write CPU and memory profiles (profiling is triggered by SIGUSR1).",
+    )
+    parser.add_argument(
+        "--profile-duration",
+        type=float,
+        default=30.0,
+        help="How long (in seconds) is the process profiled after SIGUSR1.",
+    )
+    parser.add_argument(
+        "--profile-tracemalloc",
+        type=int,
+        default=0,
+        metavar="FRAMES",
+        help="Trace memory allocations since the startup storing FRAMES frames per allocation, "
+        "so that the memory snapshot includes objects allocated before SIGUSR1 "
+        "(0 = trace only while profiling; PYTHONTRACEMALLOC=FRAMES works the same way).",
+    )
+
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Append all received notifications to this file (can be replayed using replay bus).",
+    )
+
+    parser.add_argument("--host", type=str, help="Hostname of the websocket server.")
+    parser.add_argument("--port", type=int, help="Port of the websocket server.")
+    parser.add_argument(
+        "--metrics-path",
+        type=str,
+        default=None,
+        help="HTTP path where metrics are served in Prometheus text format.",
+    )
+    parser.add_argument(
+        "--admin-path",
+        type=str,
+        default=None,
+        help="HTTP path where active connections are listed in json.",
+    )
+    parser.add_argument(
+        "--internal-no-auth",
+        action="store_true",
+        default=False,
+        help="Serve metrics and admin paths without authentication to clients connecting "
+        "from a loopback address (don't use behind a reverse proxy running on the same host).",
+    )
+
+    parser.add_argument(
+        "--dedup-window",
+        type=float,
+        default=0.0,
+        help="Drop notifications which repeat the previous notification of the same controller, "
+        "module and action within this time (in seconds, 0 = disabled).",
+    )
+    parser.add_argument(
+        "--dedup-size",
+        type=int,
+        default=1024,
+        help="Maximal number of (controller, module, action) tracked by the deduplication.",
+    )
+
+    parser.add_argument(
+        "--priority",
+        type=parse_priority,
+        action="append",
+        default=[],
+        metavar="MODULE=PRIORITY",
+        help="Priority of notifications of the module (e.g. maintain=10), notifications with "
+        "a higher priority are sent to each client first (default is 0, can be repeated).",
+    )
+
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=2 ** 20,
+        help="Maximal size of an incoming message in bytes.",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=2 ** 5,
+        help="Maximal number of incoming messages buffered per connection.",
+    )
+    parser.add_argument(
+        "--read-limit",
+        type=int,
+        default=2 ** 16,
+        help="High-water limit of the incoming buffer per connection in bytes.",
+    )
+    parser.add_argument(
+        "--write-limit",
+        type=int,
+        default=2 ** 16,
+        help="High-water limit of the outgoing buffer per connection in bytes.",
+    )
 
     subparsers = parser.add_subparsers(help="buses", dest="bus")
     subparsers.required = True
@@ -79,27 +273,153 @@ def main() -> typing.NoReturn:
         "unix-socket", help="use unix socket to obtain notifications"
     )
     unix_parser.add_argument("--path", dest="path", default="/tmp/foris-controller-notify.soc")
-    if "ubus" in available_buses:
-        ubus_parser = subparsers.add_parser("ubus", help="use ubus to obtain notificatins")
-        ubus_parser.add_argument("--path", dest="path", default="/var/run/ubus/ubus.sock")
-    if "mqtt" in available_buses:
-        mqtt_parser = subparsers.add_parser("mqtt", help="use mqtt to obtain notificatins")
-        mqtt_parser.add_argument("--mqtt-host", dest="mqtt_host", default="localhost")
-        mqtt_parser.add_argument("--mqtt-port", dest="mqtt_port", default=1883, type=int)
-        mqtt_parser.add_argument(
-            "--mqtt-passwd-file",
-            type=lambda x: read_passwd_file(x),
-            help="path to passwd file (first record will be used to authenticate)",
-            default=None,
+    replay_parser = subparsers.add_parser(
+        "replay", help="replay notifications which were recorded using --record"
+    )
+    replay_parser.add_argument("--file", dest="file", required=True)
+    replay_parser.add_argument(
+        "--speed",
+        dest="speed",
+        type=float,
+        default=1.0,
+        help="replay speed (1 = original, 2 = twice as fast, 0 = as fast as possible)",
+    )
+    replay_parser.add_argument(
+        "--repeat", dest="repeat", action="store_true", default=False, help="replay in a loop"
+    )
+    ubus_parser = subparsers.add_parser("ubus", help="use ubus to obtain notificatins")
+    ubus_parser.add_argument("--path", dest="path", default="/var/run/ubus/ubus.sock")
+    mqtt_parser = subparsers.add_parser("mqtt", help="use mqtt to obtain notificatins")
+    mqtt_parser.add_argument("--mqtt-host", dest="mqtt_host", default="localhost")
+    mqtt_parser.add_argument("--mqtt-port", dest="mqtt_port", default=1883, type=int)
+    mqtt_parser.add_argument(
+        "--mqtt-passwd-file",
+        type=lambda x: read_passwd_file(x),
+        help="path to passwd file (first record will be used to authenticate)",
+        default=None,
+    )
+
+    return parser
+
+
+def parse_options(argv: typing.Optional[typing.List[str]] = None) -> argparse.Namespace:
+    """ Parses the command line options and merges them with the config file
+
+    :param argv: command line arguments (sys.argv[1:] when None)
+    :returns: parsed options (exits when they are not valid)
+    """
+    from .config import ConfigError, read_config, set_defaults
+
+    parser = prepare_parser()
+    options = parser.parse_args(argv)
+    if options.config:
+        try:
+            set_defaults(parser, read_config(options.config))
+        except ConfigError as e:
+            parser.error(str(e))
+        options = parser.parse_args(argv)
+
+    for name in REQUIRED_OPTIONS:
+        if getattr(options, name) is None:
+            parser.error("--%s has to be set on the command line or in the config file" % name)
+    for name in [options.bus] + options.authentication:
+        _check_available(parser, name)
+    return options
+
+
+def prepare_authentication_methods(options: argparse.Namespace) -> typing.List[callable]:
+    """ Imports the authentication methods
+
+    :param options: parsed options
+    :returns: authentication methods in the order in which they should be tried
+    """
+    authentication_methods: typing.List[callable] = []
+
+    if "ubus" in options.authentication:
+        from foris_ws.authentication.ubus import authenticate
+
+        authentication_methods.append(authenticate)
+    if "filesystem" in options.authentication:
+        from foris_ws.authentication.filesystem import authenticate
+
+        authentication_methods.append(authenticate)
+    if "none" in options.authentication:
+        from foris_ws.authentication.none import authenticate
+
+        authentication_methods.append(authenticate)
+
+    return authentication_methods
+
+
+def configure_authentication_cache(options: argparse.Namespace):
+    if "ubus" in options.authentication:
+        from foris_ws.authentication.ubus import session_cache
+
+        session_cache.configure(
+            options.auth_cache_ttl, options.auth_cache_negative_ttl, options.auth_cache_size
         )
 
-    options = parser.parse_args()
 
-    if options.debug:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig()
+def configure_deduplication(options: argparse.Namespace):
+    from foris_ws import bus_listener
+    from foris_ws.dedup import Deduplicator
+
+    if options.dedup_window <= 0:
+        bus_listener.deduplicator = None
+    elif bus_listener.deduplicator is None:
+        bus_listener.deduplicator = Deduplicator(options.dedup_window, options.dedup_size)
+    elif (bus_listener.deduplicator.window, bus_listener.deduplicator.max_size) != (
+        options.dedup_window,
+        options.dedup_size,
+    ):
+        bus_listener.deduplicator.configure(options.dedup_window, options.dedup_size)
+
+
+def configure_logging(options: argparse.Namespace):
+    level = logging.DEBUG if options.debug else getattr(logging, options.log_level.upper())
+    logging.getLogger().setLevel(level)
+    if options.trace_sample > 0:
+        logging.getLogger("foris_ws.trace").setLevel(logging.INFO)
+
+
+def main() -> typing.NoReturn:
+    options = parse_options()
+
+    import asyncio
+    import signal
+    import websockets
+
+    from . import metrics
+    from .authentication.chain import AuthenticationChain
+    from .bus_listener import make_bus_listener
+    from .config import changed_options
+    from .connection import SUBPROTOCOLS, connections, estimate_connection_memory
+    from .loop_monitor import LoopLagMonitor, enable_slow_callback_detection
+    from .profiling import Profiler
+    from .revalidation import SessionRevalidator
+    from .ws_handling import (
+        connection_handler as ws_connection_handler,
+        ServerProtocol,
+        make_process_request,
+    )
+
+    logging.basicConfig()
+    configure_logging(options)
+    profiler = Profiler(
+        options.profile_dir, options.profile_duration, max(options.profile_tracemalloc, 1)
+    )
+    if options.profile_tracemalloc > 0:
+        profiler.start_tracing()
+    connections.trace_sample = options.trace_sample
+    connections.priorities = dict(options.priority)
+    configure_deduplication(options)
     logger.debug("Version %s" % __version__)
+    logger.debug(
+        "Worst-case memory per connection: %d bytes",
+        estimate_connection_memory(
+            options.max_size, options.max_queue, options.read_limit, options.write_limit
+        ),
+    )
 
     if options.bus == "ubus":
         from foris_client.buses.ubus import UbusListener
@@ -130,42 +450,103 @@ def main() -> typing.NoReturn:
             "credentials": options.mqtt_passwd_file,
         }
 
-    authentication_methods: typing.List[callable] = []
-
-    if "ubus" in options.authentication:
-        from foris_ws.authentication.ubus import authenticate
+    elif options.bus == "replay":
+        from foris_ws.recording import ReplayListener
 
-        authentication_methods.append(authenticate)
-    if "filesystem" in options.authentication:
-        from foris_ws.authentication.filesystem import authenticate
-
-        authentication_methods.append(authenticate)
-    if "none" in options.authentication:
-        from foris_ws.authentication.none import authenticate
+        logger.debug("Replaying notifications from %s.", options.file)
+        listener_class = ReplayListener
+        listener_args = {"path": options.file, "speed": options.speed, "repeat": options.repeat}
 
-        authentication_methods.append(authenticate)
+    if options.record:
+        from foris_ws import bus_listener as bus_listener_module
+        from foris_ws.recording import NotificationRecorder
 
-    def try_authenticate(*args, **kwargs):
-        last_res = None
-        for method in authentication_methods:
-            last_res = method(*args, **kwargs)
-            if last_res is None:
-                return None  # passed
+        logger.debug("Recording notifications to %s.", options.record)
+        bus_listener_module.recorder = NotificationRecorder(options.record)
 
-        # return error from last method or None if no auth method is specified
-        return last_res
+    authentication_chain = AuthenticationChain(
+        prepare_authentication_methods(options), options.auth_workers, options.auth_concurrent
+    )
+    configure_authentication_cache(options)
 
     loop = asyncio.get_event_loop()
+    metrics.registry.gauge(
+        "foris_ws_tasks", "Number of pending asyncio tasks.", lambda: len(asyncio.all_tasks(loop))
+    )
 
     # prepare bus listener
     bus_listener = make_bus_listener(listener_class, **listener_args)
 
+    revalidator = SessionRevalidator(
+        connections,
+        authentication_chain.verify,
+        options.revalidate_interval,
+        options.revalidate_max_sessions,
+        authentication_chain.session_key,
+    )
+    revalidator_task: typing.Optional[asyncio.Future] = None
+
+    def start_revalidator():
+        nonlocal revalidator_task
+        if revalidator.interval > 0 and revalidator_task is None:
+            revalidator_task = asyncio.ensure_future(revalidator.run())
+        elif revalidator.interval <= 0 and revalidator_task is not None:
+            revalidator_task.cancel()
+            revalidator_task = None
+
+    def reload():
+        nonlocal options
+        logger.warning("Reloading configuration.")
+        try:
+            new_options = parse_options()
+        except SystemExit:
+            logger.error("Configuration is not valid, keeping the current one.")
+            return
+        try:
+            # everything is prepared before the first setting is replaced,
+            # so that a failure can't leave the configuration applied only partially
+            priorities = dict(new_options.priority)
+            authentication_methods = prepare_authentication_methods(new_options)
+        except Exception:
+            logger.exception("Failed to prepare configuration, keeping the current one.")
+            return
+
+        reloadable, restart = changed_options(options, new_options)
+        if restart:
+            logger.warning(
+                "Options which can't be changed without restart: %s", ", ".join(sorted(restart))
+            )
+        # connections and their subscriptions are kept, only the settings are replaced
+        configure_logging(new_options)
+        connections.trace_sample = new_options.trace_sample
+        connections.priorities = priorities
+        configure_deduplication(new_options)
+        configure_authentication_cache(new_options)
+        authentication_chain.methods = authentication_methods
+        authentication_chain.concurrent = new_options.auth_concurrent
+        connections.set_limits(
+            max_size=new_options.max_size,
+            max_queue=new_options.max_queue,
+            write_limit=new_options.write_limit,
+        )
+        revalidator.interval = new_options.revalidate_interval
+        revalidator.max_sessions = new_options.revalidate_max_sessions
+        start_revalidator()
+        for name in restart:  # keep the values which are really used
+            setattr(new_options, name, getattr(options, name))
+        options = new_options
+        logger.warning(
+            "Configuration reloaded (changed: %s).", ", ".join(sorted(reloadable)) or "nothing"
+        )
+
     def shutdown():
         bus_listener.disconnect()
         loop.stop()
 
     loop.add_signal_handler(signal.SIGTERM, shutdown)
     loop.add_signal_handler(signal.SIGINT, shutdown)
+    loop.add_signal_handler(signal.SIGHUP, reload)
+    loop.add_signal_handler(signal.SIGUSR1, profiler.trigger)
 
     async def run_listener():
         logger.debug("Starting to listen to foris bus.")
@@ -174,11 +555,32 @@ def main() -> typing.NoReturn:
 
     # prepare websocket
     websocket_server = websockets.serve(
-        ws_connection_handler, options.host, options.port, process_request=try_authenticate
+        ws_connection_handler,
+        options.host,
+        options.port,
+        process_request=make_process_request(
+            authentication_chain.authenticate,
+            options.metrics_path,
+            options.internal_no_auth,
+            options.admin_path,
+        ),
+        create_protocol=ServerProtocol,
+        subprotocols=SUBPROTOCOLS,
+        max_size=options.max_size,
+        max_queue=options.max_queue,
+        read_limit=options.read_limit,
+        write_limit=options.write_limit,
     )
 
     asyncio.ensure_future(websocket_server)
     asyncio.ensure_future(run_listener())
+    if options.loop_lag_interval > 0:
+        lag_monitor = LoopLagMonitor(options.loop_lag_interval)
+        lag_monitor.register_metrics()
+        asyncio.ensure_future(lag_monitor.run())
+    if options.slow_callback_threshold is not None:
+        enable_slow_callback_detection(options.slow_callback_threshold)
+    start_revalidator()
     loop.run_forever()
 
 
@@ -0,0 +1,104 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+
+class SessionCache:
+    """ Bounded cache of authentication decisions which expire after a while
+    """
+
+    def __init__(self, ttl: float = 0.0, negative_ttl: float = 0.0, max_size: int = 256):
+        """ Initializes the cache
+
+        :param ttl: how long (in seconds) the granted access is cached (0 disables caching)
+        :param negative_ttl: how long (in seconds) the denied access is cached
+        :param max_size: maximal number of cached sessions
+        """
+        self.lock = threading.Lock()
+        self._records: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.configure(ttl, negative_ttl, max_size)
+
+    def configure(self, ttl: float, negative_ttl: float, max_size: int):
+        """ Updates cache parameters (cached records are dropped)
+
+        :param ttl: how long (in seconds) the granted access is cached (0 disables caching)
+        :param negative_ttl: how long (in seconds) the denied access is cached
+        :param max_size: maximal number of cached sessions
+        """
+        with self.lock:
+            self.ttl = ttl
+            self.negative_ttl = negative_ttl
+            self.max_size = max_size
+            self._records.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and (self.ttl > 0 or self.negative_ttl > 0)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """ Looks up the cached decision
+
+        :param key: session identifier
+        :returns: (True, decision) if the record was found and is still valid (False, None) otherwise
+        """
+        with self.lock:
+            record = self._records.get(key)
+            if record is not None:
+                expires, value = record
+                if expires > time.monotonic():
+                    self._records.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._records[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, granted: bool):
+        """ Stores the decision into the cache
+
+        :param key: session identifier
+        :param value: decision to be stored
+        :param granted: whether the access was granted (determines ttl)
+        """
+        ttl = self.ttl if granted else self.negative_ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self.lock:
+            self._records[key] = (time.monotonic() + ttl, value)
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """ Removes the decision from the cache
+
+        :param key: session identifier
+        """
+        with self.lock:
+            self._records.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,182 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import logging
+import sys
+import time
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from websockets.http import Headers
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+AuthResult = typing.Optional[typing.Tuple[int, Headers, bytes]]
+AuthMethod = typing.Callable[[str, Headers], AuthResult]
+
+
+def method_name(method: AuthMethod) -> str:
+    """ Returns a short name of the authentication method (e.g. ubus, filesystem, none)
+    """
+    return method.__module__.rsplit(".", 1)[-1]
+
+
+def method_session_key(method: AuthMethod) -> typing.Callable[[Headers], typing.Hashable]:
+    """ Returns function which extracts the session of the request used by the method
+        (methods without session_key() in their module use the whole Cookie header)
+    """
+    session_key = getattr(sys.modules.get(method.__module__), "session_key", None)
+    return session_key or (lambda request_headers: request_headers.get("Cookie"))
+
+
+def is_unavailable(res: AuthResult) -> bool:
+    """ Checks whether the method failed to decide (e.g. its backend could not be reached)
+    """
+    return res is not None and res[0] >= HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class AuthenticationChain:
+    """ Tries configured authentication methods until one of them succeeds
+
+    The methods are blocking (they might run subprocesses or read files) so they are
+    called in bounded thread pools so that the event loop is not stalled. Each method has
+    its own pool, so checks stalled on one backend (which keep running even when they are
+    not needed anymore) can't hold up the checks of the other methods.
+    """
+
+    def __init__(
+        self, methods: typing.List[AuthMethod], max_workers: int = 4, concurrent: bool = False
+    ):
+        """ Initializes the chain
+
+        :param methods: authentication methods to be tried (in this order)
+        :param max_workers: maximal number of checks of a single method performed at the same time
+        :param concurrent: try all methods at once and accept the first success
+        """
+        self.methods = methods
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self.executors: typing.Dict[AuthMethod, ThreadPoolExecutor] = {}
+
+    def _executor(self, method: AuthMethod) -> ThreadPoolExecutor:
+        executor = self.executors.get(method)
+        if executor is None:
+            executor = self.executors[method] = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="auth-%s" % method_name(method)
+            )
+        return executor
+
+    def shutdown(self):
+        """ Stops the worker threads (running checks are not waited for)
+        """
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+    async def _call(self, method: AuthMethod, path: str, request_headers: Headers) -> AuthResult:
+        loop = asyncio.get_running_loop()
+        name = method_name(method)
+        start = time.monotonic()
+        try:
+            res = await loop.run_in_executor(self._executor(method), method, path, request_headers)
+        except asyncio.CancelledError:
+            metrics.auth_total.inc(name, "cancelled")
+            raise
+        except Exception:
+            metrics.auth_total.inc(name, "error")
+            raise
+        finally:
+            metrics.auth_duration.observe(time.monotonic() - start, name)
+        if res is None:
+            metrics.auth_total.inc(name, "granted")
+        else:
+            metrics.auth_total.inc(name, "unavailable" if is_unavailable(res) else "denied")
+        return res
+
+    def session_key(self, request_headers: Headers) -> typing.Hashable:
+        """ Identifies the session of the request (requests with the same key are authenticated
+            the same way by all the methods)
+        """
+        return tuple(method_session_key(method)(request_headers) for method in self.methods)
+
+    async def authenticate(self, path: str, request_headers: Headers) -> AuthResult:
+        """ Authenticates the request (can be used as process_request of websockets server)
+
+        :returns: None if auth was successful or tuple(status_code, headers, body) to respond to client
+        """
+        try:
+            res, _ = await self._authenticate(path, request_headers)
+        except Exception:
+            metrics.handshakes.inc("error")
+            raise
+        metrics.handshakes.inc("accepted" if res is None else "rejected")
+        return res
+
+    async def verify(
+        self, path: str, request_headers: Headers
+    ) -> typing.Tuple[AuthResult, bool]:
+        """ Authenticates the request without counting it as a handshake
+            (used to verify sessions of already connected clients)
+
+        :returns: (the same result as authenticate(), whether some method failed to decide)
+        """
+        return await self._authenticate(path, request_headers)
+
+    async def _authenticate(
+        self, path: str, request_headers: Headers
+    ) -> typing.Tuple[AuthResult, bool]:
+        if self.concurrent and len(self.methods) > 1:
+            return await self._authenticate_concurrently(path, request_headers)
+
+        last_res = None
+        unavailable = False
+        for method in self.methods:
+            last_res = await self._call(method, path, request_headers)
+            if last_res is None:
+                return None, False  # passed
+            unavailable = unavailable or is_unavailable(last_res)
+
+        # return error from last method or None if no auth method is specified
+        return last_res, unavailable
+
+    async def _authenticate_concurrently(
+        self, path: str, request_headers: Headers
+    ) -> typing.Tuple[AuthResult, bool]:
+        tasks = [
+            asyncio.ensure_future(self._call(method, path, request_headers))
+            for method in self.methods
+        ]
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is None:
+                        return None, False  # passed
+        finally:
+            # checks which are still running are not needed anymore
+            for task in tasks:
+                task.cancel()
+
+        # all failed -> return error from the last method (the same way as sequential evaluation)
+        results = [task.result() for task in tasks]
+        return results[-1], any(is_unavailable(res) for res in results)
@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2019 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2019, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -18,16 +18,89 @@
 #
 
 import logging
+import os
 import re
+import threading
+import time
 
+from collections import OrderedDict
 from http import HTTPStatus
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 from websockets.http import Headers
 from cachelib.file import FileSystemCache
 
 logger = logging.getLogger(__name__)
 
 SESSIONS_DIR = "/tmp/foris-sessions"
+SESSION_RE = re.compile(r"session=([^;\s]*)")
+
+
+class SessionStore:
+    """ Keeps decoded sessions in memory
+
+    A session file is read again only when it was modified or removed (checked using
+    stat of the file) or when the decoded record is older than max_age. The max_age
+    limit is there because the expiration of sessions is stored inside the files.
+    """
+
+    def __init__(self, path: str, max_age: float = 30.0, max_size: int = 1024):
+        """ Initializes the store
+
+        :param path: directory where the sessions are stored
+        :param max_age: maximal age of a decoded session in seconds
+        :param max_size: maximal number of decoded sessions kept in memory
+        """
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._fs_cache: Optional[FileSystemCache] = None
+        self._sessions: "OrderedDict[str, Tuple[Tuple[int, int, int], float, Any]]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def fs_cache(self) -> FileSystemCache:
+        if self._fs_cache is None:
+            self._fs_cache = FileSystemCache(self.path)
+        return self._fs_cache
+
+    def get(self, session_id: str) -> Any:
+        """ Returns decoded session
+
+        :param session_id: id of the session
+        :returns: session data or None if session was not found
+        """
+        key = "session:" + session_id
+        with self.lock:
+            filename = self.fs_cache._get_filename(key)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                self._sessions.pop(session_id, None)
+                return None
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+            record = self._sessions.get(session_id)
+            now = time.monotonic()
+            if record is not None and record[0] == signature and record[1] > now:
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+                return record[2]
+
+            self.misses += 1
+            data = self.fs_cache.get(key)
+            if data is None:
+                self._sessions.pop(session_id, None)
+                return None
+            self._sessions[session_id] = (signature, now + self.max_age, data)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+            return data
+
+
+session_store = SessionStore(SESSIONS_DIR)
 
 
 def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Headers, bytes]]:
@@ -43,7 +116,7 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
         logger.debug("Missing cookie.")
         return HTTPStatus.FORBIDDEN, Headers([]), b"Missing Cookie"
 
-    foris_ws_session_re = re.search(r"session=([^;\s]*)", request_headers["Cookie"])
+    foris_ws_session_re = SESSION_RE.search(request_headers["Cookie"])
     if not foris_ws_session_re:
         logger.debug("Missing foris.ws.session in cookie.")
         return HTTPStatus.FORBIDDEN, Headers([]), b"Missing foris.ws.session in cookie"
@@ -51,8 +124,7 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
     session_id = foris_ws_session_re.group(1)
     logger.debug("Using session id %s" % session_id)
 
-    fs_cache = FileSystemCache(SESSIONS_DIR)
-    data = fs_cache.get("session:" + session_id)
+    data = session_store.get(session_id)
 
     if data is None:
         logger.debug("Session '%s' not found." % session_id)
@@ -64,3 +136,10 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
 
     logger.debug("Connection granted.")
     return None
+
+
+def session_key(request_headers: Headers) -> Optional[str]:
+    """ Returns id of the session used by the request (None if it is missing)
+    """
+    foris_ws_session_re = SESSION_RE.search(request_headers.get("Cookie", ""))
+    return foris_ws_session_re.group(1) if foris_ws_session_re else None
@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2018 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2018, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -17,18 +17,24 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 #
 
-import json
 import logging
 import re
-import subprocess
-import os
 
 from http import HTTPStatus
 from typing import Optional, Tuple
 from websockets.http import Headers
 
+from .cache import SessionCache
+from .ubus_client import UbusClientError, get_client
+
 logger = logging.getLogger(__name__)
 
+session_cache = SessionCache()
+
+SESSION_RE = re.compile(r"foris.ws.session=([^;\s]*)")
+
+UNAVAILABLE = HTTPStatus.SERVICE_UNAVAILABLE, Headers([]), b"Failed to verify session"
+
 
 def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Headers, bytes]]:
     """ Performs an authentication based on authentication token placed in cookie
@@ -43,7 +49,7 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
         logger.debug("Missing cookie.")
         return HTTPStatus.FORBIDDEN, Headers([]), b"Missing Cookie"
 
-    foris_ws_session_re = re.search(r"foris.ws.session=([^;\s]*)", request_headers["Cookie"])
+    foris_ws_session_re = SESSION_RE.search(request_headers["Cookie"])
     if not foris_ws_session_re:
         logger.debug("Missing foris.ws.session in cookie.")
         return HTTPStatus.FORBIDDEN, Headers([]), b"Missing foris.ws.session in cookie"
@@ -51,6 +57,36 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
     session_id = foris_ws_session_re.group(1)
     logger.debug("Using session id %s" % session_id)
 
+    cached, res = session_cache.get(session_id)
+    if cached:
+        logger.debug(
+            "Using cached decision for session '%s' (hits=%d, misses=%d).",
+            session_id,
+            session_cache.hits,
+            session_cache.misses,
+        )
+        return res
+
+    res = _check_session_access(session_id)
+    if res is not UNAVAILABLE:
+        session_cache.set(session_id, res, res is None)
+    return res
+
+
+def session_key(request_headers: Headers) -> Optional[str]:
+    """ Returns id of the session used by the request (None if it is missing)
+    """
+    foris_ws_session_re = SESSION_RE.search(request_headers.get("Cookie", ""))
+    return foris_ws_session_re.group(1) if foris_ws_session_re else None
+
+
+def _check_session_access(session_id: str) -> Optional[Tuple[int, Headers, bytes]]:
+    """ Asks ubus whether the session is able to listen
+
+    :param session_id: ubus session id
+    :returns: None if access was granted or tuple(status_code, headers, body) to respond to client
+              (UNAVAILABLE when ubus could not be reached)
+    """
     params = {
         "ubus_rpc_session": session_id or "",
         "scope": "ubus",
@@ -60,21 +96,17 @@ def authenticate(path: str, request_headers: Headers) -> Optional[Tuple[int, Hea
 
     # Verify whether the client is able to access the listen function
 
-    # We need to open a separate program to verify the session_id
+    # We need to use a separate ubus connection (kept in a helper process)
     # beacause the program might be already listening on ubus in some mode
-    args = ["ubus", "-S", "call", "session", "access", json.dumps(params)]
-    if "FORIS_WS_UBUS_AUTH_SOCK" in os.environ:
-        args.insert(1, os.environ["FORIS_WS_UBUS_AUTH_SOCK"])
-        args.insert(1, "-s")
-
-    proces = subprocess.Popen(args, stdout=subprocess.PIPE)
-    stdout, _ = proces.communicate()
-    if proces.returncode != 0:
-        logger.debug("Session '%s' not found." % session_id)
+    try:
+        data = get_client().access(params)
+    except UbusClientError as e:
+        if e.unavailable:
+            logger.warning("Failed to verify session '%s' (%s)." % (session_id, e))
+            return UNAVAILABLE
+        logger.debug("Session '%s' not found (%s)." % (session_id, e))
         return HTTPStatus.FORBIDDEN, Headers([]), b"Session not found"
 
-    data = json.loads(stdout)
-
     if not data["access"]:
         logger.debug("Connection denied.")
         return HTTPStatus.FORBIDDEN, Headers([]), b"Access for session denied"
@@ -0,0 +1,196 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Persistent ubus client used to verify sessions
+
+The python ubus binding can hold only a single connection per process and this connection
+might be already used by the bus listener. So the session verification is performed
+in a long-lived helper process which has its own ubus connection. Requests are serialized
+through a queue and passed to the helper by a worker thread which restarts the helper
+whenever it fails.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import typing
+
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# ubus errors which mean that the connection is broken (not that the access was denied)
+CONNECTION_ERRORS = ("Connection failed", "Request timed out")
+
+
+class UbusClientError(Exception):
+    def __init__(self, message: str, unavailable: bool = False):
+        """ Initializes the error
+
+        :param message: error message
+        :param unavailable: ubus could not be reached (so the session state is unknown)
+        """
+        super().__init__(message)
+        self.unavailable = unavailable
+
+
+class UbusSessionClient:
+    """ Passes session access requests to the helper process
+    """
+
+    RESPONSE_TIMEOUT: float = 5.0
+
+    def __init__(self, socket_path: typing.Optional[str] = None):
+        """ Initializes the client and starts the worker thread
+
+        :param socket_path: path to ubus socket (None means default)
+        """
+        self.socket_path = socket_path
+        self.requests: "queue.Queue[typing.Tuple[dict, Future]]" = queue.Queue()
+        self.process: typing.Optional[subprocess.Popen] = None
+        self.thread = threading.Thread(target=self._worker, name="ubus-auth", daemon=True)
+        self.thread.start()
+
+    def access(self, params: dict) -> dict:
+        """ Calls session access via the helper process
+
+        :param params: arguments of the session access call
+        :returns: response of session access call
+        :raises UbusClientError: when the call failed
+        """
+        future: Future = Future()
+        self.requests.put((params, future))
+        return future.result()
+
+    def _start(self) -> subprocess.Popen:
+        args = [sys.executable, "-m", __name__]
+        if self.socket_path:
+            args.extend(["--path", self.socket_path])
+        logger.debug("Starting ubus auth helper: %s", args)
+        return subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True
+        )
+
+    def _stop(self):
+        if self.process:
+            logger.debug("Stopping ubus auth helper (pid=%d).", self.process.pid)
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def _call(self, params: dict) -> dict:
+        if not self.process or self.process.poll() is not None:
+            self._stop()
+            self.process = self._start()
+
+        self.process.stdin.write(json.dumps(params) + "\n")
+        self.process.stdin.flush()
+        readable, _, _ = select.select([self.process.stdout], [], [], self.RESPONSE_TIMEOUT)
+        line = self.process.stdout.readline() if readable else ""
+        if not line:
+            raise BrokenPipeError("ubus auth helper is not responding")
+        return json.loads(line)
+
+    def _worker(self):
+        while True:
+            params, future = self.requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                try:
+                    response = self._call(params)
+                except (OSError, ValueError) as e:
+                    # restart the helper and retry once
+                    logger.warning("ubus auth helper failed (%s), restarting.", e)
+                    self._stop()
+                    response = self._call(params)
+            except Exception as e:
+                self._stop()
+                future.set_exception(UbusClientError(str(e), unavailable=True))
+                continue
+
+            if "error" in response:
+                future.set_exception(
+                    UbusClientError(response["error"], response.get("unavailable", False))
+                )
+            else:
+                future.set_result(response)
+
+
+_client: typing.Optional[UbusSessionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> UbusSessionClient:
+    """ Returns shared client (it is created on the first use)
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = UbusSessionClient(os.environ.get("FORIS_WS_UBUS_AUTH_SOCK"))
+        return _client
+
+
+def serve(socket_path: typing.Optional[str]):
+    """ Serves session access requests read from stdin (helper process)
+
+    :param socket_path: path to ubus socket (None means default)
+    """
+    import ubus
+
+    for line in sys.stdin:
+        params = json.loads(line)
+        for _ in range(2):
+            try:
+                if not ubus.get_connected():
+                    if socket_path:
+                        ubus.connect(socket_path=socket_path)
+                    else:
+                        ubus.connect()
+            except Exception as e:
+                response = {"error": str(e), "unavailable": True}
+                break
+            try:
+                res = ubus.call("session", "access", params)
+                response = res[0] if res else {"access": False}
+                break
+            except Exception as e:
+                if ubus.get_connected() and not any(m in str(e) for m in CONNECTION_ERRORS):
+                    # the call itself failed (e.g. the session doesn't exist)
+                    response = {"error": str(e)}
+                    break
+                # the connection is broken (ubusd might have been restarted)
+                # so reconnect and try once more before reporting the error
+                if ubus.get_connected():
+                    ubus.disconnect()
+                response = {"error": str(e), "unavailable": True}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="foris-ws-ubus-auth")
+    parser.add_argument("--path", dest="path", default=None)
+    serve(parser.parse_args().path)
@@ -0,0 +1,272 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" End-to-end load generator
+
+Starts foris-ws on the unix-socket bus, feeds it with notifications through the
+notification socket (a stand-in for foris-controller) and measures how the notifications
+are delivered to many websocket clients. Everything runs on localhost.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import websockets
+
+from .loop_monitor import percentile
+
+
+class ServerStats:
+    """ Samples RSS and CPU time of the server process (from /proc)
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.max_rss: int = 0
+
+    def rss(self) -> int:
+        with open("/proc/%d/status" % self.pid) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def cpu_time(self) -> float:
+        with open("/proc/%d/stat" % self.pid) as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are 14th and 15th fields of stat
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def sample(self):
+        self.max_rss = max(self.max_rss, self.rss())
+
+    async def run(self, interval: float = 0.5):
+        while True:
+            self.sample()
+            await asyncio.sleep(interval)
+
+
+class NotificationSender:
+    """ Sends notifications to foris-ws the same way as foris-controller does
+        (json prefixed by its length)
+    """
+
+    def __init__(self, path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def send(self, notification: dict):
+        raw = json.dumps(notification).encode("utf8")
+        self.sock.sendall(struct.pack("I", len(raw)) + raw)
+
+    def close(self):
+        self.sock.close()
+
+
+class Client:
+    """ Websocket client which records delivery latencies
+    """
+
+    def __init__(self, url: str, modules: typing.List[str]):
+        self.url = url
+        self.modules = modules
+        self.latencies: typing.List[float] = []
+        self.ready = asyncio.Event()
+
+    async def run(self):
+        async with websockets.connect(self.url, max_size=None) as ws:
+            await ws.send(json.dumps({"action": "subscribe", "params": self.modules}))
+            await ws.recv()  # subscription reply
+            self.ready.set()
+            async for message in ws:
+                received = time.time()
+                data = json.loads(message).get("data", {})
+                if "sent" in data:
+                    self.latencies.append(received - data["sent"])
+
+
+def wait_for(condition: typing.Callable[[], bool], timeout: float):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("foris-ws did not start in time")
+        time.sleep(0.1)
+
+
+def port_opened(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def start_server(
+    options, bus_args: typing.List[str], notifications_path: typing.Optional[str] = None
+) -> subprocess.Popen:
+    """ Starts foris-ws and waits till it is ready
+
+    :param options: parsed options (host, port, server_args, server_output, start_timeout)
+    :param bus_args: bus subcommand and its arguments
+    :param notifications_path: path to notification socket which should be created
+    """
+    args = [sys.executable, "-m", "foris_ws", "-a", "none", "--host", options.host]
+    args += ["--port", str(options.port)] + options.server_args + bus_args
+    output = None if options.server_output else subprocess.DEVNULL
+    process = subprocess.Popen(args, stdout=output, stderr=output)
+    wait_for(lambda: port_opened(options.host, options.port), options.start_timeout)
+    if notifications_path:
+        wait_for(lambda: os.path.exists(notifications_path), options.start_timeout)
+    return process
+
+
+async def run_benchmark(options, notifications_path: str, server_pid: int) -> dict:
+    rng = random.Random(options.seed)
+    modules = ["module%02d" % i for i in range(options.modules)]
+    url = "ws://%s:%d/" % (options.host, options.port)
+
+    clients = [
+        Client(url, rng.sample(modules, min(options.subscriptions, len(modules))))
+        for _ in range(options.clients)
+    ]
+    subscribers = {e: sum(e in c.modules for c in clients) for e in modules}
+
+    stats = ServerStats(server_pid)
+    stats_task = asyncio.ensure_future(stats.run())
+
+    # open connections in batches so the listen backlog is not exceeded
+    client_tasks = []
+    for i in range(0, len(clients), options.connect_batch):
+        batch = clients[i : i + options.connect_batch]
+        client_tasks.extend(asyncio.ensure_future(e.run()) for e in batch)
+        await asyncio.wait([asyncio.ensure_future(e.ready.wait()) for e in batch], timeout=30)
+    connected = sum(e.ready.is_set() for e in clients)
+
+    rss_idle = stats.rss()
+    cpu_start = stats.cpu_time()
+
+    sender = NotificationSender(notifications_path)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    expected = 0
+    for seq in range(options.notifications):
+        module = rng.choice(modules)
+        expected += subscribers[module]
+        sender.send(
+            {
+                "module": module,
+                "kind": "notification",
+                "action": "bench",
+                "data": {"seq": seq, "sent": time.time(), "payload": "x" * options.payload_size},
+            }
+        )
+        await asyncio.sleep(max(start + (seq + 1) / options.rate - loop.time(), 0))
+    duration = loop.time() - start
+
+    # wait for in-flight notifications
+    deadline = loop.time() + options.drain_timeout
+    while sum(len(e.latencies) for e in clients) < expected and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+
+    cpu = stats.cpu_time() - cpu_start
+    stats.sample()
+    sender.close()
+    stats_task.cancel()
+    for task in client_tasks:
+        task.cancel()
+    await asyncio.gather(*client_tasks, return_exceptions=True)
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    return {
+        "clients": options.clients,
+        "connected": connected,
+        "modules": options.modules,
+        "subscriptions_per_client": options.subscriptions,
+        "payload_size": options.payload_size,
+        "rate": options.rate,
+        "notifications": options.notifications,
+        "duration_s": duration,
+        "expected_deliveries": expected,
+        "deliveries": len(latencies),
+        "dropped": expected - len(latencies),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_p99_s": percentile(latencies, 0.99),
+        "latency_max_s": latencies[-1] if latencies else 0.0,
+        "server_rss_idle_bytes": rss_idle,
+        "server_rss_max_bytes": stats.max_rss,
+        "server_cpu_s": cpu,
+        "server_cpu_percent": cpu / duration * 100 if duration else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="foris-ws-bench")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18888)
+    parser.add_argument("--clients", type=int, default=100, help="number of websocket clients")
+    parser.add_argument("--modules", type=int, default=10, help="number of distinct modules")
+    parser.add_argument(
+        "--subscriptions", type=int, default=3, help="number of modules subscribed by each client"
+    )
+    parser.add_argument("--rate", type=float, default=50.0, help="notifications per second")
+    parser.add_argument("--notifications", type=int, default=500, help="notifications to send")
+    parser.add_argument("--payload-size", type=int, default=200, help="size of notification data")
+    parser.add_argument("--connect-batch", type=int, default=100, help="clients opened at once")
+    parser.add_argument("--drain-timeout", type=float, default=10.0)
+    parser.add_argument("--start-timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0, help="seed of subscription mix")
+    parser.add_argument("--output", type=str, default=None, help="write json results to file")
+    parser.add_argument("--server-output", action="store_true", default=False)
+    parser.add_argument(
+        "server_args", nargs="*", help="extra foris-ws arguments (after --)", default=[]
+    )
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="foris-ws-bench-") as directory:
+        notifications_path = os.path.join(directory, "notifications.soc")
+        server = start_server(
+            options, ["unix-socket", "--path", notifications_path], notifications_path
+        )
+        try:
+            result = asyncio.run(run_benchmark(options, notifications_path, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
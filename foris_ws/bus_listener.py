@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2018 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2018, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -17,31 +17,60 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 #
 
+import functools
 import logging
+import time
 
-from typing import Type, Dict, Any
-from foris_client.buses.base import BaseListener
+from typing import TYPE_CHECKING, Type, Dict, Any, Optional
 
+from . import metrics
 from .connection import connections
+from .dedup import Deduplicator
+from .recording import NotificationRecorder
+
+if TYPE_CHECKING:
+    # only needed for annotations (the listener class is chosen by the caller)
+    from foris_client.buses.base import BaseListener
 
 logger = logging.getLogger(__name__)
 
+# records received notifications when set
+recorder: Optional[NotificationRecorder] = None
+
+# drops repeated notifications when set
+deduplicator: Optional[Deduplicator] = None
+
 
-def handler(notification: dict, controller_id: str):
+def handler(notification: dict, controller_id: str, bus: str = ""):
     """ Receives a notification and triggers coroutine to propagate it
 
     :param notification: notification to be sent
     :param controller_id: id of the controller from which the notification came
+    :param bus: name of the bus (used in metrics)
     """
 
-    logger.debug("Handling bus notification from %s: %s", controller_id, notification)
-    connections.publish_notification(controller_id, notification["module"], notification)
-    logger.debug("Handling finished: %s - %s", controller_id, notification)
+    received = time.monotonic()
+    metrics.notifications_received.inc(bus)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Handling bus notification from %s: %s", controller_id, notification)
+    if recorder is not None:
+        recorder.record(notification, controller_id)
+    if deduplicator is not None and deduplicator.is_duplicate(notification, controller_id):
+        metrics.notifications_suppressed.inc(notification["module"])
+        if debug:
+            logger.debug("Suppressing repeated notification from %s.", controller_id)
+        return
+    connections.publish_notification(
+        controller_id, notification["module"], notification, received
+    )
+    if debug:
+        logger.debug("Handling finished: %s - %s", controller_id, notification)
 
 
 def make_bus_listener(
-    listener_class: Type[BaseListener], **listener_kwargs: Dict[str, Any]
-) -> BaseListener:
+    listener_class: Type["BaseListener"], **listener_kwargs: Dict[str, Any]
+) -> "BaseListener":
     """ Prepares a new foris notification listener
 
     :param listener_class: listener class to be used (UbusListener, UnixSocketListener, ...)
@@ -50,5 +79,6 @@ def make_bus_listener(
     """
 
     logger.debug("Initializing bus listener (%s: %s)", listener_class, listener_kwargs)
-    listener = listener_class(**dict(handler=handler), **listener_kwargs)
+    bus_handler = functools.partial(handler, bus=listener_class.__name__)
+    listener = listener_class(**dict(handler=bus_handler), **listener_kwargs)
     return listener
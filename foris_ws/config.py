@@ -0,0 +1,133 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Configuration file
+
+The file contains a json object whose keys are the long command line options without
+the leading dashes, e.g.::
+
+    {"authentication": ["ubus"], "auth-cache-ttl": 30, "max-queue": 16, "log-level": "info"}
+
+Options given on the command line take precedence over the file. The file is read again
+when SIGHUP is received and the options listed in RELOADABLE are applied to the running
+server (the other options are kept till the next restart).
+"""
+
+import argparse
+import json
+import typing
+
+# options which can be changed without restarting the server
+RELOADABLE: typing.FrozenSet[str] = frozenset(
+    (
+        "authentication",
+        "auth_concurrent",
+        "auth_cache_ttl",
+        "auth_cache_negative_ttl",
+        "auth_cache_size",
+        "revalidate_interval",
+        "revalidate_max_sessions",
+        "trace_sample",
+        "max_size",
+        "max_queue",
+        "write_limit",
+        "log_level",
+        "debug",
+        "priority",
+        "dedup_window",
+        "dedup_size",
+    )
+)
+
+# options which make no sense in the file
+IGNORED: typing.FrozenSet[str] = frozenset(("help", "version", "config", "bus"))
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def read_config(path: str) -> dict:
+    """ Reads the configuration file
+
+    :param path: path to the file
+    :returns: options (keys are converted to argparse destinations)
+    :raises ConfigError: when the file can't be read or it is not a json object
+    """
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError("Failed to read config file '%s': %s" % (path, e))
+    if not isinstance(config, dict):
+        raise ConfigError("Config file '%s' doesn't contain a json object" % path)
+    return {key.replace("-", "_"): value for key, value in config.items()}
+
+
+def set_defaults(parser: argparse.ArgumentParser, config: dict):
+    """ Uses the options from the config file as parser defaults
+
+    :param parser: parser of the command line options (without the bus subparsers)
+    :param config: options read by read_config()
+    :raises ConfigError: when an option is unknown or its value is not valid
+    """
+    actions = {action.dest: action for action in parser._actions if action.dest not in IGNORED}
+    for key, value in config.items():
+        if key not in actions:
+            raise ConfigError("Unknown option '%s' in config file" % key)
+        action = actions[key]
+        if action.nargs in ("+", "*") or isinstance(action, argparse._AppendAction):
+            # lists are expected (a single value can be written without brackets)
+            value = config[key] = value if isinstance(value, list) else [value]
+        if action.nargs == 0:  # flags
+            if not isinstance(value, bool):
+                raise ConfigError("Invalid value of '%s': %r" % (key, value))
+            continue
+        items = value if isinstance(value, list) else [value]
+        for index, item in enumerate(items):
+            if action.type is not None and not isinstance(action.type, type):
+                # custom conversion (the same string format as on the command line)
+                try:
+                    items[index] = action.type(item)
+                except (ValueError, TypeError, argparse.ArgumentTypeError):
+                    raise ConfigError("Invalid value of '%s': %r" % (key, item))
+            elif action.type is not None and not isinstance(item, action.type):
+                # allow ints to be used for floats
+                if not (action.type is float and isinstance(item, int)):
+                    raise ConfigError("Invalid value of '%s': %r" % (key, item))
+            if action.choices is not None and item not in action.choices:
+                raise ConfigError("Invalid value of '%s': %r" % (key, item))
+        if not isinstance(value, list):
+            config[key] = items[0]
+    parser.set_defaults(**config)
+
+
+def changed_options(
+    old: argparse.Namespace, new: argparse.Namespace
+) -> typing.Tuple[typing.Set[str], typing.Set[str]]:
+    """ Compares two sets of options
+
+    :returns: (changed options which can be applied, changed options which need a restart)
+    """
+    changed = {
+        key
+        for key in set(vars(old)) | set(vars(new))
+        if getattr(old, key, None) != getattr(new, key, None)
+    }
+    return changed & RELOADABLE, changed - RELOADABLE
@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2017-2023 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2017-2023, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -21,15 +21,29 @@
 import asyncio
 import json
 import logging
+import sys
 import threading
+import time
+import weakref
 import websockets
 
-from typing import List, Set, Union, Callable, Type
+from typing import Deque, Dict, FrozenSet, Hashable, List, Optional, Tuple, Union, Callable, Type
+from websockets.http import Headers
 
 from functools import wraps
+from collections import deque
 from collections.abc import Iterable
 
+from . import metrics
+
 logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger("foris_ws.trace")
+
+
+# websocket subprotocol which selects the protocol version 2
+# (clients which don't offer it during the handshake use the original protocol)
+PROTOCOL_V2 = "foris-ws.v2"
+SUBPROTOCOLS: List[str] = [PROTOCOL_V2]
 
 
 class IncorrectMessage(Exception):
@@ -51,10 +65,110 @@ def _with_lock(func: Callable) -> Callable:
     return inner
 
 
+# Subscription sets are shared among connections which are subscribed to the same modules
+# (typically all the tabs of the same web client). They are dropped once no connection uses them.
+_subscription_sets: "weakref.WeakValueDictionary[FrozenSet[str], FrozenSet[str]]" = (
+    weakref.WeakValueDictionary()
+)
+
+EMPTY_SUBSCRIPTIONS: FrozenSet[str] = frozenset()
+
+
+def _intern_subscriptions(modules: FrozenSet[str]) -> FrozenSet[str]:
+    """ Returns a shared instance of the subscription set
+
+    :param modules: subscribed modules
+    :returns: deduplicated set of modules (module names are interned as well)
+    """
+    if not modules:
+        return EMPTY_SUBSCRIPTIONS
+    shared = _subscription_sets.get(modules)
+    if shared is None:
+        shared = frozenset(sys.intern(module) for module in modules)
+        _subscription_sets[shared] = shared
+    return shared
+
+
+def _apply_limits(handler: websockets.WebSocketServerProtocol, limits: Dict[str, Optional[int]]):
+    for name in ("max_size", "max_queue"):
+        if name in limits:
+            setattr(handler, name, limits[name])
+    if "write_limit" in limits:
+        handler.write_limit = limits["write_limit"]
+        transport = getattr(handler, "transport", None)
+        if transport is not None:
+            transport.set_write_buffer_limits(limits["write_limit"])
+
+
+class OutboundQueue:
+    """ Notifications which are waiting to be sent to a client split into priority lanes
+
+    The lane with the highest priority is served first. To prevent starvation, a waiting lane
+    which was passed over FAIRNESS_LIMIT times in a row is served next regardless of its priority.
+    """
+
+    __slots__ = ("lanes", "skipped")
+
+    FAIRNESS_LIMIT: int = 8
+
+    def __init__(self):
+        # only non-empty lanes are kept
+        self.lanes: Dict[int, Deque[Tuple[str, Optional["Delivery"]]]] = {}
+        self.skipped: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def push(self, priority: int, str_msg: str, delivery: Optional["Delivery"] = None):
+        lane = self.lanes.get(priority)
+        if lane is None:
+            lane = self.lanes[priority] = deque()
+            self.skipped[priority] = 0
+        lane.append((str_msg, delivery))
+
+    def pop(self) -> Tuple[str, Optional["Delivery"]]:
+        """ Takes the next notification which should be sent
+
+        :returns: (encoded notification, delivery)
+        :raises KeyError: when the queue is empty
+        """
+        if len(self.lanes) == 1:  # the common case - no competing lanes
+            priority = next(iter(self.lanes))
+        else:
+            priority = max(self.lanes)
+            starving = max(self.lanes, key=self.skipped.__getitem__)
+            if self.skipped[starving] >= self.FAIRNESS_LIMIT:
+                priority = starving
+            for waiting in self.lanes:
+                self.skipped[waiting] += 1
+
+        lane = self.lanes[priority]
+        item = lane.popleft()
+        if lane:
+            self.skipped[priority] = 0
+        else:
+            del self.lanes[priority]
+            del self.skipped[priority]
+        return item
+
+
 class Connection:
     """ Class which represents the connection between the client and the websocket server
     """
 
+    __slots__ = (
+        "client_id",
+        "handler",
+        "modules",
+        "exiting",
+        "pending",
+        "bytes_sent",
+        "connected_at",
+        "last_activity",
+        "version",
+        "outbound",
+    )
+
     PING_THREAD_TIMEOUT: float = 60.0
 
     def __init__(self, client_id: int, handler: websockets.WebSocketServerProtocol):
@@ -65,9 +179,14 @@ class Connection:
         """
         self.client_id: int = client_id
         self.handler: websockets.WebSocketServerProtocol = handler
-        self.lock: threading.Lock = threading.Lock()
-        self.modules: Set[str] = set()
+        self.modules: FrozenSet[str] = EMPTY_SUBSCRIPTIONS
         self.exiting: bool = False
+        self.pending: int = 0  # notifications which are waiting to be sent
+        self.bytes_sent: int = 0
+        self.connected_at: float = time.time()
+        self.last_activity: float = self.connected_at
+        self.version: int = 2 if getattr(handler, "subprotocol", None) == PROTOCOL_V2 else 1
+        self.outbound: Optional[OutboundQueue] = None  # created only while sending
 
     @staticmethod
     def _prepare_modules(modules: Union[List[str], str]) -> List[str]:
@@ -80,14 +199,14 @@ class Connection:
         if isinstance(modules, str):
             return [modules]
         if not isinstance(modules, Iterable):
-            logger.warning("Invalid module list '%s'." % modules)
+            logger.warning("Invalid module list '%s'.", modules)
             raise IncorrectMessage("Not a valid module list '%s'" % modules)
 
         for module in modules:
             if isinstance(module, str):
                 res.append(module)
             else:
-                logger.warning("Module item is not a string '%s'." % module)
+                logger.warning("Module item is not a string '%s'.", module)
                 raise IncorrectMessage("Module item is not a string '%s'" % module)
         return res
 
@@ -100,11 +219,15 @@ class Connection:
         """
 
         modules = Connection._prepare_modules(modules)
-        logger.debug("Subscribing client '%d' for modules %s." % (self.client_id, modules))
-        self.modules = self.modules.union(set(modules))
-        logger.debug("Client '%d' subscriptions: %s" % (self.client_id, ", ".join(self.modules)))
+        logger.debug("Subscribing client '%d' for modules %s.", self.client_id, modules)
+        self.modules = _intern_subscriptions(self.modules.union(modules))
+        self._log_subscriptions()
         return {"result": True, "subscriptions": list(self.modules)}
 
+    def _log_subscriptions(self):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Client '%d' subscriptions: %s", self.client_id, ", ".join(self.modules))
+
     def _unsubscribe(self, modules: List[str]) -> dict:
         """ Unsubscribes modules to the client and prepares appropriate response
 
@@ -114,30 +237,121 @@ class Connection:
         """
 
         modules = Connection._prepare_modules(modules)
-        logger.debug("Unsubscribing client '%d' from modules %s." % (self.client_id, modules))
-        self.modules = self.modules.difference(set(modules))
-        logger.debug("Client '%d' subscriptions: %s" % (self.client_id, ", ".join(self.modules)))
+        logger.debug("Unsubscribing client '%d' from modules %s.", self.client_id, modules)
+        self.modules = _intern_subscriptions(self.modules.difference(modules))
+        self._log_subscriptions()
         return {"result": True, "subscriptions": list(self.modules)}
 
-    @_with_lock
     async def send_message_to_client(self, msg: dict):
         """ Sends a message to the connected client
+
+        All sends are performed within the event loop thread and websockets
+        writes each frame at once so no extra locking is required here.
+
         :param msg: message to be sent to the client (in json format)
         """
-        str_msg = json.dumps(msg)
-        logger.debug("Sending message to client %d: %s", self.client_id, str_msg)
-        await self.handler.send(str_msg)
+        await self._send(json.dumps(msg))
+
+    def queue_notification(
+        self, str_msg: str, delivery: Optional["Delivery"] = None, priority: int = 0
+    ):
+        """ Queues already encoded notification to be sent to the connected client
+
+        Notifications are sent one by one, the ones with a higher priority first
+        (see OutboundQueue).
+
+        :param str_msg: notification encoded to json
+        :param delivery: delivery of the notification to all subscribed clients
+        :param priority: priority of the notification
+        """
+        self.pending += 1
+        if self.outbound is None:
+            self.outbound = OutboundQueue()
+            self.outbound.push(priority, str_msg, delivery)
+            asyncio.ensure_future(self._send_queued())
+        else:
+            self.outbound.push(priority, str_msg, delivery)
+
+    async def _send_queued(self):
+        outbound = self.outbound
+        while outbound.lanes:
+            str_msg, delivery = outbound.pop()
+            await self.send_notification(str_msg, delivery)
+        self.outbound = None
+
+    async def send_notification(self, str_msg: str, delivery: Optional["Delivery"] = None):
+        """ Sends already encoded notification to the connected client
+        :param str_msg: notification encoded to json
+        :param delivery: delivery of the notification to all subscribed clients
+        """
+        sent = False
+        try:
+            await self._send(str_msg)
+            sent = True
+        except Exception as e:
+            # client is probably disconnecting (it will be removed from connections soon)
+            logger.debug("Failed to send notification to client %d: %s", self.client_id, e)
+        finally:
+            self.pending -= 1
+            if delivery is not None:
+                delivery.finished(sent)
+
+    async def _send(self, str_msg: str):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending message to client %d: %s", self.client_id, str_msg)
+        try:
+            await self.handler.send(str_msg)
+        except Exception:
+            metrics.send_failures.inc()
+            raise
+        metrics.messages_sent.inc()
+        metrics.bytes_sent.inc(amount=len(str_msg))
+        self.bytes_sent += len(str_msg)
+        self.last_activity = time.time()
+
+    @staticmethod
+    def _parse_request(message: str) -> dict:
+        try:
+            return json.loads(message)
+        except ValueError:
+            logger.warning("The message is not in json format. (%s)", message)
+            raise IncorrectMessage("Not in json format.")
+
+    @staticmethod
+    def _check_operation(operation: dict) -> Tuple[str, List[str]]:
+        """ Checks whether the operation (action + params) is valid
+
+        :returns: (action, modules)
+        :raises IncorrectMessage: on invalid operation
+        """
+        if "action" not in operation:
+            logger.warning("Action was not defined in the message.")
+            raise IncorrectMessage("Action not defined.")
+
+        if operation["action"] == "list":
+            return "list", []
+
+        if "params" not in operation:
+            logger.warning("Params were not defined in the message.")
+            raise IncorrectMessage("Params not defined.")
+
+        if operation["action"] not in ("subscribe", "unsubscribe"):
+            logger.warning("Unkown action '%s'", operation["action"])
+            raise IncorrectMessage("Unknown action '%s'" % operation["action"])
+
+        return operation["action"], Connection._prepare_modules(operation["params"])
 
     async def process_message(self, message: str):
         """ Processes a message which is received from the client
         :param message: message which will be processed
         """
+        self.last_activity = time.time()
+        if self.version >= 2:
+            await self._process_message_v2(message)
+            return
+
         try:
-            try:
-                parsed: dict = json.loads(message)
-            except ValueError:
-                logger.warning("The message is not in json format. (%s)" % message)
-                raise IncorrectMessage("Not in json format.")
+            parsed = Connection._parse_request(message)
 
             if "action" not in parsed:
                 logger.warning("Action was not defined in the message.")
@@ -154,16 +368,134 @@ class Connection:
                 await self.send_message_to_client(self._unsubscribe(parsed["params"]))
                 return
 
-            logger.warning("Unkown action '%s'" % parsed["action"])
+            logger.warning("Unkown action '%s'", parsed["action"])
             raise IncorrectMessage("Unknown action '%s'" % parsed["action"])
         except IncorrectMessage as e:
             await self.send_message_to_client({"result": False, "error": str(e)})
 
+    async def _process_message_v2(self, message: str):
+        """ Processes a request of the protocol version 2
+
+        A request carries an id which is echoed in the reply and either a single operation
+        ({"id": 1, "action": "subscribe", "params": [...]}) or a list of operations
+        ({"id": 2, "ops": [{"action": "subscribe", ...}, {"action": "unsubscribe", ...}]}).
+        The operations are applied at once (nothing is applied when any of them is invalid)
+        and the reply contains only the modules which were actually subscribed
+        or unsubscribed. The "list" operation adds all current subscriptions to the reply.
+
+        :param message: message which will be processed
+        """
+        request_id = None
+        try:
+            parsed = Connection._parse_request(message)
+            if not isinstance(parsed, dict):
+                logger.warning("The message is not a json object. (%s)", message)
+                raise IncorrectMessage("Not a json object.")
+            request_id = parsed.get("id")
+            operations = parsed["ops"] if "ops" in parsed else [parsed]
+            if not isinstance(operations, list) or not all(
+                isinstance(operation, dict) for operation in operations
+            ):
+                raise IncorrectMessage("Ops are not a list of json objects.")
+            checked = [Connection._check_operation(operation) for operation in operations]
+        except IncorrectMessage as e:
+            await self.send_message_to_client({"id": request_id, "result": False, "error": str(e)})
+            return
+
+        old = self.modules
+        modules = set(old)
+        listed = False
+        for action, operation_modules in checked:
+            if action == "subscribe":
+                modules.update(operation_modules)
+            elif action == "unsubscribe":
+                modules.difference_update(operation_modules)
+            else:
+                listed = True
+        self.modules = _intern_subscriptions(frozenset(modules))
+        if self.modules != old:
+            self._log_subscriptions()
+
+        reply: dict = {"id": request_id, "result": True}
+        subscribed = self.modules - old
+        if subscribed:
+            reply["subscribed"] = sorted(subscribed)
+        unsubscribed = old - self.modules
+        if unsubscribed:
+            reply["unsubscribed"] = sorted(unsubscribed)
+        if listed:
+            reply["subscriptions"] = sorted(self.modules)
+        await self.send_message_to_client(reply)
+
     def close(self):
         """ Sets a flag which should eventually close the connection.
         """
         self.exiting = True
 
+    def describe(self) -> dict:
+        """ Describes the connection (used for introspection)
+
+        :returns: connection details
+        """
+        peer = getattr(self.handler, "remote_address", None)
+        return {
+            "client_id": self.client_id,
+            "peer": "%s:%s" % tuple(peer[:2]) if peer else None,
+            "subscriptions": sorted(self.modules),
+            "protocol": self.version,
+            "queue_depth": self.pending,
+            "bytes_sent": self.bytes_sent,
+            "connected_at": self.connected_at,
+            "last_activity": self.last_activity,
+        }
+
+    def memory_footprint(self) -> int:
+        """ Estimates the memory which is held by this connection record
+            (websockets buffers are not included)
+
+        :returns: size in bytes
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.modules)
+
+
+class Delivery:
+    """ Tracks the delivery of a single notification to all subscribed clients
+    """
+
+    __slots__ = ("module", "received", "remaining", "slowest", "trace")
+
+    def __init__(self, module: str, received: float):
+        """ Initializes the delivery
+
+        :param module: module of the notification
+        :param received: when the notification was received from the bus (time.monotonic())
+        """
+        self.module = module
+        self.received = received
+        self.remaining = 0
+        self.slowest = 0.0
+        self.trace: Optional[dict] = None  # filled only for sampled notifications
+
+    def finished(self, sent: bool):
+        """ Records that sending to a single client has finished
+
+        :param sent: whether the notification was sent successfully
+        """
+        if sent:
+            latency = time.monotonic() - self.received
+            metrics.delivery_latency.observe(latency, self.module)
+            if latency > self.slowest:
+                self.slowest = latency
+        elif self.trace is not None:
+            self.trace["failed"] += 1
+        self.remaining -= 1
+        if self.remaining == 0:
+            if self.slowest:
+                metrics.slowest_delivery_latency.observe(self.slowest, self.module)
+            if self.trace is not None:
+                self.trace["slowest"] = round(self.slowest, 6)
+                trace_logger.info("%s", json.dumps(self.trace, sort_keys=True))
+
 
 class Connections:
     """ Class which represents all active connections
@@ -174,6 +506,11 @@ class Connections:
     def __init__(self):
         """ Initializes Connections
         """
+        self.trace_sample: int = 0  # trace every n-th notification (0 = disabled)
+        self.limits: Dict[str, Optional[int]] = {}
+        # module -> priority of its notifications (higher is sent first, default is 0)
+        self.priorities: Dict[str, int] = {}
+        self._trace_counter: int = 0
         self.lock = threading.Lock()
         self._connections = {}
         self.current_event_loop: Type[asyncio.AbstractEventLoop] = asyncio.get_event_loop()
@@ -185,6 +522,8 @@ class Connections:
         :param handler: handler which is used to communicate with the client
         """
         new_client_id = Connections.client_id
+        if self.limits:
+            _apply_limits(handler, self.limits)
         self._connections[new_client_id] = Connection(new_client_id, handler)
         Connections.client_id += 1
         return new_client_id
@@ -203,6 +542,36 @@ class Connections:
             pass
         del self._connections[client_id]
 
+    @_with_lock
+    def set_limits(self, **limits: Optional[int]):
+        """ Changes the limits of the websocket connections
+            (applied to active connections and to connections registered later)
+
+        :param limits: max_size, max_queue and write_limit (see websockets.serve)
+        """
+        self.limits = limits
+        for connection in self._connections.values():
+            _apply_limits(connection.handler, limits)
+
+    @_with_lock
+    def group_by_session(
+        self, session_key: Optional[Callable[[Headers], Hashable]] = None
+    ) -> Dict[Hashable, List[Connection]]:
+        """ Groups active connections by the session used during the handshake
+
+        :param session_key: extracts the session from the handshake request
+                            (None = the whole cookie which was sent by the client)
+        :returns: connections grouped by the session
+        """
+        res: Dict[Hashable, List[Connection]] = {}
+        for connection in self._connections.values():
+            request_headers = getattr(connection.handler, "request_headers", None)
+            if request_headers is None:
+                continue  # handshake was not finished yet
+            key = session_key(request_headers) if session_key else request_headers.get("Cookie")
+            res.setdefault(key, []).append(connection)
+        return res
+
     @_with_lock
     async def handle_message(self, client_id: int, message: str):
         """ Handles a message received from the client
@@ -211,29 +580,142 @@ class Connections:
         :param message: message to be handled
         """
         if client_id not in self._connections:
-            logging.warning("Client '%d' is present it the connection list" % client_id)
+            logger.warning("Client '%d' is not present in the connection list", client_id)
             return
         try:
             await self._connections[client_id].process_message(message)
         except Exception as e:
-            logging.error("Exception was raised: %s" % str(e))
+            logger.error("Exception was raised: %s", e)
             raise
 
     @_with_lock
-    def publish_notification(self, controller_id: str, module: str, message: dict):
+    def publish_notification(
+        self, controller_id: str, module: str, message: dict, received: Optional[float] = None
+    ):
         """ Publishes notification of the module to clients which have the module subscribed
             does nothing if no module is present in the message
 
         :param controller_id: id of the controller from which the notification came
         :param module: name of the module related to the notification
         :param message: a notification which will be published to all relevant clients
+        :param received: when the notification was received from the bus (time.monotonic())
         """
         message["controller_id"] = controller_id
-        for _, connection in self._connections.items():
+        if received is None:
+            received = time.monotonic()
+        # can be called from another thread -> fan out within the event loop
+        self.current_event_loop.call_soon_threadsafe(self._fan_out, module, message, received)
+
+    def _fan_out(self, module: str, message: dict, received: float):
+        str_msg = None
+        priority = self.priorities.get(module, 0)
+        delivery = Delivery(module, received)
+        for connection in list(self._connections.values()):
             if module in connection.modules:
-                asyncio.run_coroutine_threadsafe(  # can be scheduled from another thread
-                    connection.send_message_to_client(message), self.current_event_loop
-                )
+                if str_msg is None:
+                    str_msg = json.dumps(message)  # encode only once for all clients
+                delivery.remaining += 1
+                connection.queue_notification(str_msg, delivery, priority)
+
+        if self.trace_sample:
+            self._trace_counter += 1
+            if self._trace_counter >= self.trace_sample:
+                self._trace_counter = 0
+                self._trace(delivery, message, str_msg)
+
+    def _trace(self, delivery: Delivery, message: dict, str_msg: Optional[str]):
+        delivery.trace = {
+            "controller_id": message.get("controller_id"),
+            "module": delivery.module,
+            "action": message.get("action"),
+            "size": len(str_msg) if str_msg is not None else 0,
+            "subscribers": delivery.remaining,
+            "failed": 0,
+            "dispatch": round(time.monotonic() - delivery.received, 6),
+        }
+        if not delivery.remaining:
+            delivery.trace["slowest"] = 0.0
+            trace_logger.info("%s", json.dumps(delivery.trace, sort_keys=True))
+
+    def describe(self) -> dict:
+        """ Describes all active connections (used for introspection)
+
+        :returns: connection details and number of subscribers per module
+        """
+        return {
+            "connections": [e.describe() for e in list(self._connections.values())],
+            "subscriptions": self.subscription_counts(),
+            "memory_footprint": self.memory_footprint(),
+        }
+
+    def subscription_counts(self) -> Dict[str, int]:
+        """ Counts subscribed clients per module
+
+        :returns: module -> number of subscribed clients
+        """
+        res: Dict[str, int] = {}
+        for connection in list(self._connections.values()):
+            for module in connection.modules:
+                res[module] = res.get(module, 0) + 1
+        return res
+
+    def memory_footprint(self) -> int:
+        """ Estimates the memory which is held by connection records
+            (shared subscription sets are counted only once)
+
+        :returns: size in bytes
+        """
+        res = sys.getsizeof(self._connections)
+        subscription_sets = {}
+        for connection in list(self._connections.values()):
+            res += sys.getsizeof(connection)
+            subscription_sets[id(connection.modules)] = connection.modules
+        return res + sum(sys.getsizeof(e) for e in subscription_sets.values())
+
+
+def estimate_connection_memory(
+    max_size: int, max_queue: int, read_limit: int, write_limit: int
+) -> int:
+    """ Estimates the worst-case memory which is required for a single connection
+
+    :param max_size: maximal size of the incoming message
+    :param max_queue: maximal length of the incoming message queue
+    :param read_limit: high-water limit of the incoming buffer
+    :param write_limit: high-water limit of the outgoing buffer
+    :returns: size in bytes
+    """
+    return (
+        max_size * max_queue
+        + read_limit
+        + write_limit
+        + sys.getsizeof(Connection(0, None))
+        + sys.getsizeof(EMPTY_SUBSCRIPTIONS)
+    )
 
 
 connections = Connections()
+
+metrics.registry.gauge(
+    "foris_ws_connections", "Number of active connections.", lambda: len(connections._connections)
+)
+metrics.registry.gauge(
+    "foris_ws_subscriptions",
+    "Number of clients subscribed to the module.",
+    lambda: {(module,): count for module, count in connections.subscription_counts().items()},
+    ["module"],
+)
+metrics.registry.gauge(
+    "foris_ws_connection_records_bytes",
+    "Estimated memory held by connection records (websockets buffers are not included).",
+    connections.memory_footprint,
+)
+metrics.registry.gauge(
+    "foris_ws_queue_depth_total",
+    "Number of notifications waiting to be sent to clients.",
+    lambda: sum(e.pending for e in list(connections._connections.values())),
+)
+metrics.registry.gauge(
+    "foris_ws_queue_depth_max",
+    "The longest queue of notifications waiting to be sent to a single client.",
+    lambda: max((e.pending for e in list(connections._connections.values())), default=0),
+)
@@ -0,0 +1,95 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import hashlib
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class Deduplicator:
+    """ Suppresses notifications which repeat the previous notification of the same
+        controller, module and action within a time window
+
+    Only a digest of the last forwarded notification is kept for each (controller_id,
+    module, action) and the number of the tracked keys is bounded (least recently
+    used keys are dropped first).
+    """
+
+    def __init__(self, window: float = 1.0, max_size: int = 1024):
+        """ Initializes the deduplicator
+
+        :param window: how long (in seconds) is a forwarded notification compared against
+        :param max_size: maximal number of tracked (controller_id, module, action) keys
+        """
+        self.window = window
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self._last: "OrderedDict[Tuple[str, str, str], Tuple[bytes, float]]" = OrderedDict()
+        self.suppressed: int = 0
+
+    def configure(self, window: float, max_size: int):
+        """ Updates the parameters (tracked notifications are dropped)
+
+        :param window: how long (in seconds) is a forwarded notification compared against
+        :param max_size: maximal number of tracked keys
+        """
+        with self.lock:
+            self.window = window
+            self.max_size = max_size
+            self._last.clear()
+
+    @staticmethod
+    def digest(notification: dict) -> bytes:
+        """ Hashes the canonical form of the notification
+        """
+        canonical = json.dumps(notification, sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+    def is_duplicate(
+        self, notification: dict, controller_id: str, now: Optional[float] = None
+    ) -> bool:
+        """ Checks whether the notification repeats the last forwarded one
+            (the notification is remembered as forwarded when it is not a duplicate)
+
+        :param notification: received notification
+        :param controller_id: id of the controller from which the notification came
+        :param now: current time (time.monotonic())
+        :returns: True if the notification should be suppressed
+        """
+        key = (controller_id, notification.get("module"), notification.get("action"))
+        digest = Deduplicator.digest(notification)
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            last = self._last.get(key)
+            if last is not None and last[0] == digest and now - last[1] < self.window:
+                # the window is not extended so the repeats are forwarded once per window
+                self.suppressed += 1
+                return True
+            self._last[key] = (digest, now)
+            self._last.move_to_end(key)
+            while len(self._last) > self.max_size:
+                self._last.popitem(last=False)
+            return False
+
+    def __len__(self) -> int:
+        return len(self._last)
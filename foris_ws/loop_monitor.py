@@ -0,0 +1,131 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import logging
+import math
+import time
+import typing
+
+from collections import deque
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples: typing.Sequence[float], fraction: float) -> float:
+    """ Computes the percentile of samples (nearest-rank method)
+
+    :param samples: sorted samples
+    :param fraction: percentile as fraction (e.g. 0.95)
+    """
+    if not samples:
+        return 0.0
+    index = max(math.ceil(fraction * len(samples)) - 1, 0)
+    return samples[min(index, len(samples) - 1)]
+
+
+class LoopLagMonitor:
+    """ Measures how late the event loop runs a callback which was scheduled in advance
+    """
+
+    QUANTILES: typing.Tuple[float, ...] = (0.5, 0.95, 0.99)
+
+    def __init__(self, interval: float = 1.0, window: int = 300, report_interval: float = 60.0):
+        """ Initializes the monitor
+
+        :param interval: time between two samples in seconds
+        :param window: number of the latest samples which are used to compute statistics
+        :param report_interval: how often (in seconds) are the statistics logged
+        """
+        self.interval = interval
+        self.report_interval = report_interval
+        self.samples: typing.Deque[float] = deque(maxlen=window)
+
+    def statistics(self) -> typing.Dict[str, float]:
+        """ Returns max and percentiles of the lag in the current window
+        """
+        samples = sorted(self.samples)
+        res = {"max": samples[-1] if samples else 0.0}
+        for quantile in self.QUANTILES:
+            res["p%d" % round(quantile * 100)] = percentile(samples, quantile)
+        return res
+
+    def _quantiles(self) -> typing.Dict[typing.Tuple[str], float]:
+        samples = sorted(self.samples)
+        res = {(str(quantile),): percentile(samples, quantile) for quantile in self.QUANTILES}
+        res[("1",)] = samples[-1] if samples else 0.0
+        return res
+
+    def register_metrics(self, registry: metrics.Registry = metrics.registry):
+        registry.gauge(
+            "foris_ws_loop_lag_seconds",
+            "Scheduling delay of the event loop in the latest window (quantile 1 = max).",
+            self._quantiles,
+            ["quantile"],
+        )
+
+    async def run(self):
+        """ Samples the lag periodically
+        """
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.samples.append(max(now - expected, 0.0))
+
+            if now - last_report >= self.report_interval:
+                last_report = now
+                logger.info(
+                    "Event loop lag: max=%(max).4fs p50=%(p50).4fs p95=%(p95).4fs p99=%(p99).4fs",
+                    self.statistics(),
+                )
+
+
+def describe_handle(handle: asyncio.Handle) -> str:
+    """ Returns human readable description of the callback (coroutine name for tasks)
+    """
+    callback = handle._callback
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return "coroutine %s" % getattr(coro, "__qualname__", repr(coro))
+    return "callback %s" % getattr(callback, "__qualname__", repr(callback))
+
+
+def enable_slow_callback_detection(threshold: float):
+    """ Logs callbacks which block the event loop for longer than the threshold
+
+    Unlike loop.slow_callback_duration this works without asyncio debug mode.
+
+    :param threshold: duration in seconds
+    """
+    original_run = asyncio.events.Handle._run
+
+    def _run(self):
+        start = time.monotonic()
+        original_run(self)
+        duration = time.monotonic() - start
+        if duration > threshold:
+            logger.warning("Slow %s took %.4fs.", describe_handle(self), duration)
+
+    asyncio.events.Handle._run = _run
@@ -0,0 +1,269 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Minimal runtime metrics which can be exported in Prometheus text format
+"""
+
+import abc
+import bisect
+import threading
+import typing
+
+LabelValues = typing.Tuple[str, ...]
+
+DEFAULT_BUCKETS: typing.Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(names: typing.Sequence[str], values: typing.Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in values
+    )
+    return "{%s}" % ",".join('%s="%s"' % (name, value) for name, value in zip(names, escaped))
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    """ Base of the metrics which are rendered in Prometheus text format
+    """
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: typing.Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+
+    @abc.abstractmethod
+    def samples(
+        self,
+    ) -> typing.Iterable[typing.Tuple[str, typing.Tuple[typing.Sequence[str], LabelValues], float]]:
+        """ Yields (sample name, (label names, label values), value) for each sample
+        """
+
+    def render(self) -> str:
+        lines = [
+            "# HELP %s %s" % (self.name, self.documentation),
+            "# TYPE %s %s" % (self.name, self.kind),
+        ]
+        for name, (label_names, label_values), value in self.samples():
+            lines.append(
+                "%s%s %s" % (name, _format_labels(label_names, label_values), _format_value(value))
+            )
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """ Monotonically increasing value
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: typing.Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: typing.Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self.lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self.lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, (self.labels, label_values), value
+
+
+class Gauge(Metric):
+    """ Value which is obtained by calling a function when the metrics are collected
+
+    The function returns either a single value or a dict {label values: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: typing.Callable[[], typing.Union[float, typing.Dict[LabelValues, float]]],
+        labels: typing.Sequence[str] = (),
+    ):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def samples(self):
+        res = self.function()
+        if not isinstance(res, dict):
+            res = {(): res}
+        for label_values, value in res.items():
+            yield self.name, (self.labels, label_values), value
+
+
+class Histogram(Metric):
+    """ Distribution of observed values in fixed buckets
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: typing.Dict[LabelValues, typing.List[float]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            record = self._values.get(label_values)
+            if record is None:
+                record = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            record[index] += 1
+            record[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        record = self._values.get(label_values)
+        return sum(record[:-1]) if record else 0
+
+    def samples(self):
+        with self.lock:
+            values = [(k, list(v)) for k, v in self._values.items()]
+        names = self.labels + ("le",)
+        for label_values, record in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), record[:-1]):
+                cumulative += count
+                yield self.name + "_bucket", (
+                    names,
+                    label_values + (_format_value(bound),),
+                ), cumulative
+            yield self.name + "_count", (self.labels, label_values), cumulative
+            yield self.name + "_sum", (self.labels, label_values), record[-1]
+
+
+class Registry:
+    """ Set of metrics which are exported together
+    """
+
+    def __init__(self):
+        self._metrics: typing.Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: typing.Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        function: typing.Callable[[], typing.Any],
+        labels: typing.Sequence[str] = (),
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, function, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """ Renders all metrics in Prometheus text format
+        """
+        return "".join(metric.render() for metric in list(self._metrics.values()))
+
+
+registry = Registry()
+
+handshakes = registry.counter(
+    "foris_ws_handshakes_total", "Number of websocket handshakes by result.", ["result"]
+)
+auth_total = registry.counter(
+    "foris_ws_auth_total",
+    "Number of authentication checks by method and outcome.",
+    ["method", "outcome"],
+)
+auth_duration = registry.histogram(
+    "foris_ws_auth_duration_seconds", "Duration of authentication checks by method.", ["method"]
+)
+notifications_received = registry.counter(
+    "foris_ws_notifications_received_total",
+    "Number of notifications received from the bus.",
+    ["bus"],
+)
+notifications_suppressed = registry.counter(
+    "foris_ws_notifications_suppressed_total",
+    "Number of notifications which were dropped as repeats of the previous one.",
+    ["module"],
+)
+messages_sent = registry.counter(
+    "foris_ws_messages_sent_total", "Number of messages sent to clients."
+)
+bytes_sent = registry.counter("foris_ws_bytes_sent_total", "Number of bytes sent to clients.")
+send_failures = registry.counter(
+    "foris_ws_send_failures_total", "Number of messages which failed to be sent to clients."
+)
+delivery_latency = registry.histogram(
+    "foris_ws_delivery_latency_seconds",
+    "Time from receiving a notification from the bus to writing it to a client.",
+    ["module"],
+)
+slowest_delivery_latency = registry.histogram(
+    "foris_ws_slowest_delivery_latency_seconds",
+    "Delivery latency of the slowest subscriber of each notification.",
+    ["module"],
+)
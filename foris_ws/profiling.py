@@ -0,0 +1,141 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import io
+import logging
+import os
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    # profiling modules are imported only when the profiling is triggered
+    import cProfile
+    import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """ Captures a time-bounded CPU profile and memory snapshot of the running process
+
+    Only the event loop thread is profiled by cProfile. Memory allocations are traced
+    in all threads but only the allocations made during the profiling are captured
+    unless tracemalloc was already running (see start_tracing() and PYTHONTRACEMALLOC).
+    """
+
+    TOP_COUNT: int = 25
+
+    def __init__(self, directory: str = "/tmp", duration: float = 30.0, frames: int = 1):
+        """ Initializes the profiler
+
+        :param directory: where the results are written
+        :param duration: how long (in seconds) the profiling lasts
+        :param frames: number of frames stored by tracemalloc for each allocation
+        """
+        self.directory = directory
+        self.duration = duration
+        self.frames = frames
+        self.profile: typing.Optional["cProfile.Profile"] = None
+        self._stop_tracemalloc: bool = False
+
+    def start_tracing(self):
+        """ Starts tracing memory allocations right away, so that the memory snapshot
+            taken during the profiling contains also the objects allocated before
+        """
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def trigger(self):
+        """ Starts the profiling (should be called from the event loop thread)
+        """
+        if self.profile is not None:
+            logger.warning("Profiling is already running.")
+            return
+
+        import cProfile
+        import tracemalloc
+
+        logger.warning("Profiling started (%.1fs).", self.duration)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._stop_tracemalloc = True
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        asyncio.get_event_loop().call_later(self.duration, self.finish)
+
+    def finish(self) -> typing.Optional[str]:
+        """ Stops the profiling and writes the results
+
+        :returns: path to the summary file
+        """
+        if self.profile is None:
+            return None
+        import tracemalloc
+
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self._stop_tracemalloc:
+            tracemalloc.stop()
+            self._stop_tracemalloc = False
+
+        prefix = os.path.join(
+            self.directory, "foris-ws-%d-%s" % (os.getpid(), time.strftime("%Y%m%d-%H%M%S"))
+        )
+        try:
+            self.profile.dump_stats(prefix + ".prof")
+            snapshot.dump(prefix + ".tracemalloc")
+            with open(prefix + ".txt", "w") as f:
+                f.write(self.summary(self.profile, snapshot))
+        except OSError as e:
+            logger.error("Failed to write profiling results to %s.* (%s).", prefix, e)
+            return None
+        finally:
+            # allow the profiling to be triggered again even when the results were lost
+            self.profile = None
+
+        logger.warning("Profiling finished, results written to %s.*", prefix)
+        return prefix + ".txt"
+
+    def summary(self, profile: "cProfile.Profile", snapshot: "tracemalloc.Snapshot") -> str:
+        """ Prepares human readable summary of the profile and the memory snapshot
+        """
+        import pstats
+        import tracemalloc
+
+        output = io.StringIO()
+        output.write("== CPU (event loop thread, sorted by cumulative time) ==\n")
+        stats = pstats.Stats(profile, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_COUNT)
+
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<*>")]
+        )
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        package = snapshot.filter_traces([tracemalloc.Filter(True, package_dir + os.sep + "*")])
+
+        output.write("\n== Memory by module ==\n")
+        for stat in snapshot.statistics("filename")[: self.TOP_COUNT]:
+            output.write("%s\n" % stat)
+        output.write("\n== Memory in foris_ws by line ==\n")
+        for stat in package.statistics("lineno")[: self.TOP_COUNT]:
+            output.write("%s\n" % stat)
+        return output.getvalue()
@@ -0,0 +1,149 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Recording of received notifications and their replay
+
+Notifications are recorded as json lines - {"t": receive time, "c": controller id,
+"n": notification}. The file is only appended to so it can be copied from a running
+instance at any time (a partially written last line is ignored during the replay).
+"""
+
+import json
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationRecorder:
+    """ Appends received notifications to a file
+    """
+
+    def __init__(self, path: str):
+        """ Opens the recording file
+
+        :param path: path to the file (it is created or appended to)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", buffering=1)  # line buffered
+        self.count: int = 0
+
+    def record(
+        self, notification: dict, controller_id: str, received: typing.Optional[float] = None
+    ):
+        """ Appends the notification to the file
+
+        :param notification: received notification
+        :param controller_id: id of the controller from which the notification came
+        :param received: when the notification was received (time.time())
+        """
+        line = json.dumps(
+            {
+                "t": received if received is not None else time.time(),
+                "c": controller_id,
+                "n": notification,
+            },
+            separators=(",", ":"),
+        )
+        with self.lock:
+            self.file.write(line + "\n")
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_recording(path: str) -> typing.Iterator[typing.Tuple[float, str, dict]]:
+    """ Reads recorded notifications
+
+    :param path: path to the recording
+    :returns: iterator of (receive time, controller id, notification)
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+                yield record["t"], record["c"], record["n"]
+            except (ValueError, KeyError):
+                logger.warning("Skipping invalid record %s:%d.", path, number)
+
+
+class ReplayListener:
+    """ Bus listener which replays recorded notifications
+
+    It has the same interface as the listeners from foris_client (handler is passed
+    to the constructor, listen() blocks till all notifications are replayed or till
+    disconnect() is called).
+    """
+
+    def __init__(
+        self, handler: typing.Callable, path: str, speed: float = 1.0, repeat: bool = False
+    ):
+        """ Initializes the listener
+
+        :param handler: function which is called for each notification (notification, controller_id)
+        :param path: path to the recording
+        :param speed: replay speed (1.0 = original speed, 2.0 = twice as fast, 0 = no delays)
+        :param repeat: start from the beginning when the recording ends
+        """
+        self.handler = handler
+        self.path = path
+        self.speed = speed
+        self.repeat = repeat
+        self.exiting = threading.Event()
+
+    def _replay(self) -> int:
+        count = 0
+        start: typing.Optional[float] = None
+        first: typing.Optional[float] = None
+        for received, controller_id, notification in read_recording(self.path):
+            if self.speed > 0:
+                if first is None:
+                    first, start = received, time.monotonic()
+                delay = start + (received - first) / self.speed - time.monotonic()
+                if delay > 0 and self.exiting.wait(delay):
+                    break
+            if self.exiting.is_set():
+                break
+            self.handler(notification, controller_id)
+            count += 1
+        return count
+
+    def listen(self) -> int:
+        """ Replays the notifications (blocks)
+
+        :returns: number of replayed notifications
+        """
+        count = self._replay()
+        while self.repeat and not self.exiting.is_set():
+            replayed = self._replay()
+            count += replayed
+            if not replayed and not self.exiting.is_set():
+                # nothing to replay (e.g. empty recording) -> repeating would only spin
+                logger.warning("Nothing to replay in '%s', not repeating.", self.path)
+                break
+        logger.debug("Replay finished (%d notifications).", count)
+        return count
+
+    def disconnect(self):
+        self.exiting.set()
@@ -0,0 +1,125 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import logging
+import typing
+
+from collections import deque
+from websockets.http import Headers
+
+from .authentication.chain import AuthResult
+from .connection import Connections
+
+logger = logging.getLogger(__name__)
+
+CLOSE_CODE_POLICY_VIOLATION = 1008
+
+
+class SessionRevalidator:
+    """ Periodically verifies whether the sessions of the connected clients are still valid
+
+    Connections are grouped by the session, so each distinct session is verified only once
+    per sweep. At most max_sessions sessions are verified during a single sweep, the rest is
+    verified during the following sweeps. Connections are closed only when the session was
+    denied, they are kept when the session could not be verified (e.g. ubus is restarting).
+    """
+
+    def __init__(
+        self,
+        connections: Connections,
+        verify: typing.Callable[[str, Headers], typing.Awaitable[typing.Tuple[AuthResult, bool]]],
+        interval: float = 60.0,
+        max_sessions: int = 16,
+        session_key: typing.Optional[typing.Callable[[Headers], typing.Hashable]] = None,
+    ):
+        """ Initializes the revalidator
+
+        :param connections: active connections
+        :param verify: coroutine which returns the authentication result and whether some method
+                       failed to decide (e.g. AuthenticationChain.verify)
+        :param interval: time between two sweeps in seconds
+        :param max_sessions: maximal number of sessions verified per sweep
+        :param session_key: extracts the session from the handshake request
+                            (e.g. AuthenticationChain.session_key, None = the whole cookie)
+        """
+        self.connections = connections
+        self.verify = verify
+        self.interval = interval
+        self.max_sessions = max_sessions
+        self.session_key = session_key
+        self._pending: typing.Deque[typing.Hashable] = deque()
+
+    async def sweep(self) -> int:
+        """ Verifies sessions and closes connections with invalid sessions
+
+        :returns: number of closed connections
+        """
+        groups = self.connections.group_by_session(self.session_key)
+        if not self._pending:
+            self._pending.extend(groups.keys())
+
+        closed = 0
+        checked = 0
+        while self._pending and checked < self.max_sessions:
+            session = self._pending.popleft()
+            connections = groups.get(session)
+            if not connections:
+                continue  # all connections of the session are already gone
+            checked += 1
+
+            handler = connections[0].handler
+            try:
+                res, unavailable = await self.verify(handler.path, handler.request_headers)
+            except Exception:
+                logger.exception("Failed to verify session, keeping its clients.")
+                continue
+            if res is None:
+                continue
+            if unavailable:
+                logger.warning(
+                    "Failed to verify session, keeping clients %s.",
+                    [e.client_id for e in connections],
+                )
+                continue
+
+            logger.debug(
+                "Session is no longer valid, closing clients %s.",
+                [e.client_id for e in connections],
+            )
+            await asyncio.gather(
+                *[
+                    connection.handler.close(CLOSE_CODE_POLICY_VIOLATION, "Session expired")
+                    for connection in connections
+                ],
+                return_exceptions=True,
+            )
+            closed += len(connections)
+
+        return closed
+
+    async def run(self):
+        """ Performs sweeps periodically
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Session revalidation failed.")
@@ -0,0 +1,276 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" Long-running soak test with leak detection
+
+Runs foris-ws against a synthetic (or replayed) notification stream while clients keep
+connecting, subscribing, unsubscribing and disconnecting (some of them abruptly). Server
+RSS, open file descriptors, number of connections and pending asyncio tasks are sampled
+periodically and a steady growth of any of them is reported.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import typing
+import urllib.request
+
+import websockets
+
+from .bench import NotificationSender, ServerStats, start_server
+
+METRICS_PATH = "/metrics"
+
+
+def open_fds(pid: int) -> int:
+    return len(os.listdir("/proc/%d/fd" % pid))
+
+
+def read_metrics(host: str, port: int) -> typing.Dict[str, float]:
+    """ Reads unlabeled metrics from the metrics endpoint
+    """
+    with urllib.request.urlopen("http://%s:%d%s" % (host, port, METRICS_PATH), timeout=5) as f:
+        lines = f.read().decode().splitlines()
+    res = {}
+    for line in lines:
+        if line.startswith("#") or "{" in line:
+            continue
+        name, value = line.split()
+        res[name] = float(value)
+    return res
+
+
+def detect_growth(
+    values: typing.Sequence[float], windows: int = 4, tolerance: float = 0.05
+) -> bool:
+    """ Detects steady growth of sampled values
+
+    Samples are split into windows and the minimum of each window is taken (so that
+    the noise caused by the churn is ignored). The growth is reported when the minima
+    grow in every window and the last minimum exceeds the first one by the tolerance.
+
+    :param values: samples in time order
+    :param windows: number of windows
+    :param tolerance: relative growth which is still acceptable
+    """
+    if len(values) < windows * 2:
+        return False
+    size = len(values) // windows
+    minima = [min(values[i * size : (i + 1) * size]) for i in range(windows)]
+    increasing = all(a < b for a, b in zip(minima, minima[1:]))
+    return increasing and minima[-1] > minima[0] * (1 + tolerance) + 1
+
+
+class ChurningClient:
+    """ Client which repeatedly connects, changes its subscriptions and disconnects
+    """
+
+    def __init__(self, url: str, modules: typing.List[str], rng: random.Random, options):
+        self.url = url
+        self.modules = modules
+        self.rng = rng
+        self.options = options
+        self.sessions = 0
+        self.received = 0
+        self.errors = 0
+
+    async def session(self):
+        ws = await websockets.connect(self.url)
+        self.sessions += 1
+        subscribed = self.rng.sample(self.modules, self.rng.randint(1, len(self.modules)))
+        await ws.send(json.dumps({"action": "subscribe", "params": subscribed}))
+
+        deadline = time.monotonic() + self.rng.uniform(0, self.options.max_session)
+        while time.monotonic() < deadline:
+            try:
+                await asyncio.wait_for(ws.recv(), timeout=max(deadline - time.monotonic(), 0.01))
+                self.received += 1
+            except asyncio.TimeoutError:
+                break
+            if self.rng.random() < 0.01:
+                await ws.send(json.dumps({"action": "unsubscribe", "params": subscribed[:1]}))
+
+        if self.rng.random() < self.options.abort_ratio:
+            ws.transport.abort()  # disconnect without closing handshake
+        else:
+            await ws.close()
+
+    async def run(self):
+        while True:
+            try:
+                await self.session()
+            except (OSError, websockets.WebSocketException):
+                self.errors += 1
+                await asyncio.sleep(1)
+
+
+async def run_soak(options, server_pid: int, notifications_path: typing.Optional[str]) -> dict:
+    rng = random.Random(options.seed)
+    modules = ["module%02d" % i for i in range(options.modules)]
+    url = "ws://%s:%d/" % (options.host, options.port)
+    clients = [
+        ChurningClient(url, modules, random.Random(rng.random()), options)
+        for _ in range(options.clients)
+    ]
+    tasks = [asyncio.ensure_future(e.run()) for e in clients]
+
+    async def notify():
+        sender = NotificationSender(notifications_path)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        seq = 0
+        try:
+            while True:
+                module = rng.choice(modules)
+                sender.send(
+                    {
+                        "module": module,
+                        "kind": "notification",
+                        "action": "soak",
+                        "data": {"seq": seq},
+                    }
+                )
+                seq += 1
+                await asyncio.sleep(max(start + seq / options.rate - loop.time(), 0))
+        finally:
+            sender.close()
+
+    if notifications_path:
+        tasks.append(asyncio.ensure_future(notify()))
+
+    stats = ServerStats(server_pid)
+    samples: typing.Dict[str, typing.List[float]] = {
+        "time": [],
+        "rss": [],
+        "fds": [],
+        "connections": [],
+        "tasks": [],
+    }
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < options.duration:
+            await asyncio.sleep(options.sample_interval)
+            server_metrics = read_metrics(options.host, options.port)
+            samples["time"].append(time.monotonic() - start)
+            samples["rss"].append(stats.rss())
+            samples["fds"].append(open_fds(server_pid))
+            samples["connections"].append(server_metrics.get("foris_ws_connections", 0))
+            samples["tasks"].append(server_metrics.get("foris_ws_tasks", 0))
+            print(
+                "t=%.0fs rss=%d fds=%d connections=%d tasks=%d"
+                % tuple(samples[e][-1] for e in ("time", "rss", "fds", "connections", "tasks")),
+                file=sys.stderr,
+            )
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # samples taken during the warm-up (caches, allocator pools, ...) are not considered
+    steady = [i for i, e in enumerate(samples["time"]) if e >= options.warmup]
+    growing = [
+        name
+        for name, values in samples.items()
+        if name != "time" and detect_growth([values[i] for i in steady])
+    ]
+    return {
+        "duration_s": options.duration,
+        "clients": options.clients,
+        "sessions": sum(e.sessions for e in clients),
+        "received": sum(e.received for e in clients),
+        "client_errors": sum(e.errors for e in clients),
+        "growing": growing,
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="foris-ws-soak")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18890)
+    parser.add_argument("--duration", type=float, default=3600.0, help="duration in seconds")
+    parser.add_argument(
+        "--sample-interval", type=float, default=30.0, help="seconds between samples"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=300.0, help="seconds ignored by the leak detection"
+    )
+    parser.add_argument("--clients", type=int, default=50, help="number of churning clients")
+    parser.add_argument("--max-session", type=float, default=30.0, help="max client session length")
+    parser.add_argument(
+        "--abort-ratio", type=float, default=0.3, help="ratio of abrupt disconnects"
+    )
+    parser.add_argument("--modules", type=int, default=10, help="number of distinct modules")
+    parser.add_argument(
+        "--rate", type=float, default=20.0, help="synthetic notifications per second"
+    )
+    parser.add_argument(
+        "--replay", type=str, default=None, help="replay recorded notifications instead"
+    )
+    parser.add_argument("--replay-speed", type=float, default=1.0)
+    parser.add_argument("--start-timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="write json results to file")
+    parser.add_argument("--server-output", action="store_true", default=False)
+    parser.add_argument(
+        "server_args", nargs="*", help="extra foris-ws arguments (after --)", default=[]
+    )
+    options = parser.parse_args()
+    options.server_args = ["--metrics-path", METRICS_PATH] + options.server_args
+
+    with tempfile.TemporaryDirectory(prefix="foris-ws-soak-") as directory:
+        if options.replay:
+            notifications_path = None
+            bus_args = [
+                "replay",
+                "--file",
+                options.replay,
+                "--speed",
+                str(options.replay_speed),
+                "--repeat",
+            ]
+        else:
+            notifications_path = os.path.join(directory, "notifications.soc")
+            bus_args = ["unix-socket", "--path", notifications_path]
+        server = start_server(options, bus_args, notifications_path)
+        try:
+            result = asyncio.run(run_soak(options, server.pid, notifications_path))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if result["growing"]:
+        print("Steady growth detected: %s" % ", ".join(result["growing"]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
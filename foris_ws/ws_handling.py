@@ -1,6 +1,6 @@
 #
 # foris-ws
-# Copyright (C) 2018 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+# Copyright (C) 2018, 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
 #
 # This program is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -17,11 +17,25 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
 #
 
+import ipaddress
+import json
 import websockets
 import logging
+import typing
 
+from http import HTTPStatus
+from websockets.http import Headers
+
+from . import metrics
 from .connection import connections
 
+ProcessRequest = typing.Callable[
+    [str, Headers], typing.Awaitable[typing.Optional[typing.Tuple[int, Headers, bytes]]]
+]
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+ADMIN_CONTENT_TYPE = "application/json"
+
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +46,90 @@ async def connection_handler(handler: websockets.WebSocketServerProtocol, path:
     logger.debug("New client id allocated (id=%d)", client_id)
     try:
         async for message in handler:
-            logger.debug("Message received (client %d): %s", client_id, message)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Message received (client %d): %s", client_id, message)
             await connections.handle_message(client_id, message)
-            logger.debug("Message processed (client %d): %s", client_id, message)
+            if debug:
+                logger.debug("Message processed (client %d): %s", client_id, message)
 
     except Exception as e:
         logger.debug("Exception caught: %s", e)
     finally:
         connections.remove_connection(client_id)
     logger.debug("Disconnecting client (id=%d).", client_id)
+
+
+def is_local_address(host: str) -> bool:
+    """ Checks whether the host is a loopback address
+
+    :param host: host name or ip address (e.g. the address of the peer)
+    """
+    if host == "localhost":
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return address.is_loopback
+
+
+class ServerProtocol(websockets.WebSocketServerProtocol):
+    """ Passes the address of the peer to process_request (see make_process_request())
+    """
+
+    async def process_request(self, path: str, request_headers: Headers):
+        if self._process_request is None:
+            return None
+        return await self._process_request(path, request_headers, self.remote_address)
+
+
+def make_process_request(
+    authenticate: ProcessRequest,
+    metrics_path: typing.Optional[str] = None,
+    no_auth: bool = False,
+    admin_path: typing.Optional[str] = None,
+) -> ProcessRequest:
+    """ Prepares process_request function of the websocket server
+
+    The internal endpoints (metrics and admin) require the same authentication as
+    the websocket handshake.
+
+    :param authenticate: authentication coroutine
+    :param metrics_path: path where the metrics are served (None = disabled)
+    :param no_auth: skip authentication of the internal endpoints for peers connected from
+                    a loopback address (the server needs to use ServerProtocol, otherwise
+                    the peer is unknown and the authentication is performed)
+    :param admin_path: path where the active connections are listed (None = disabled)
+    :returns: process_request coroutine
+    """
+
+    async def authenticate_internal(
+        path: str, request_headers: Headers, remote_address: typing.Optional[tuple]
+    ):
+        if no_auth and remote_address and is_local_address(remote_address[0]):
+            return None
+        return await authenticate(path, request_headers)
+
+    async def process_request(
+        path: str, request_headers: Headers, remote_address: typing.Optional[tuple] = None
+    ):
+        if metrics_path and path == metrics_path:
+            res = await authenticate_internal(path, request_headers, remote_address)
+            if res is not None:
+                return res
+            body = metrics.registry.render().encode()
+            return HTTPStatus.OK, Headers([("Content-Type", METRICS_CONTENT_TYPE)]), body
+
+        if admin_path and path == admin_path:
+            res = await authenticate_internal(path, request_headers, remote_address)
+            if res is not None:
+                return res
+            body = json.dumps(connections.describe()).encode()
+            return HTTPStatus.OK, Headers([("Content-Type", ADMIN_CONTENT_TYPE)]), body
+
+        return await authenticate(path, request_headers)
+
+    return process_request
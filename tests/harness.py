@@ -0,0 +1,197 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+""" In-process test harness
+
+The server runs within the event loop of the test on an ephemeral port, notifications
+are injected through a fake bus listener and the frames are awaited directly, so no
+foris-controller, ubusd, rpcd or mosquitto is needed. Only the tests which exercise
+the buses themselves should use the subprocess fixtures from tests/fixtures.py.
+
+Usage::
+
+    def test_something():
+        async def run():
+            async with Harness() as harness:
+                client = await harness.connect()
+                await client.request({"action": "subscribe", "params": ["web"]})
+                harness.notify("web", "set_language", {"language": "cs"})
+                assert (await client.recv())["module"] == "web"
+
+        asyncio.run(run())
+"""
+
+import asyncio
+import json
+import threading
+import typing
+
+import websockets
+
+from websockets.http import Headers
+
+from foris_ws.authentication.chain import AuthenticationChain
+from foris_ws.authentication.none import authenticate as authenticate_none
+from foris_ws.bus_listener import make_bus_listener
+from foris_ws.connection import SUBPROTOCOLS, connections
+from foris_ws.ws_handling import connection_handler, make_process_request
+
+HOST = "127.0.0.1"
+ID = "0000000A00000214"
+RECV_TIMEOUT = 2.0
+
+
+class FakeListener:
+    """ Listener with the same interface as the listeners from foris_client,
+        notifications are passed to it directly via notify()
+    """
+
+    def __init__(self, handler: typing.Callable, controller_id: str = ID):
+        self.handler = handler
+        self.controller_id = controller_id
+        self.exiting = threading.Event()
+
+    def notify(self, notification: dict, controller_id: typing.Optional[str] = None):
+        self.handler(notification, controller_id or self.controller_id)
+
+    def listen(self):
+        self.exiting.wait()
+
+    def disconnect(self):
+        self.exiting.set()
+
+
+class FakeHandler:
+    """ Stands for the websocket protocol of a connected client in the unit tests,
+        sent frames are collected in sent
+    """
+
+    def __init__(self, session: typing.Optional[str] = None):
+        """ Prepares the handler
+
+        :param session: session placed into the cookie of the handshake request
+        """
+        self.path = "/"
+        self.request_headers = Headers([("Cookie", "session=%s" % session)] if session else [])
+        self.sent: typing.List[dict] = []
+        self.closed = False
+
+    async def send(self, message: str):
+        self.sent.append(json.loads(message))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = True
+
+
+class Client:
+    """ Websocket client which awaits the frames directly
+    """
+
+    def __init__(self, websocket: websockets.WebSocketClientProtocol):
+        self.websocket = websocket
+
+    async def send(self, message: typing.Union[dict, str]):
+        await self.websocket.send(message if isinstance(message, str) else json.dumps(message))
+
+    async def recv(self, timeout: float = RECV_TIMEOUT) -> dict:
+        return json.loads(await asyncio.wait_for(self.websocket.recv(), timeout))
+
+    async def request(self, message: typing.Union[dict, str]) -> dict:
+        await self.send(message)
+        return await self.recv()
+
+    async def assert_silent(self, timeout: float = 0.05):
+        """ Checks that no frame arrives within the timeout
+        """
+        try:
+            message = await asyncio.wait_for(self.websocket.recv(), timeout)
+        except asyncio.TimeoutError:
+            return
+        raise AssertionError("Unexpected message received: %s" % message)
+
+    async def close(self):
+        await self.websocket.close()
+
+
+class Harness:
+    """ Runs the websocket server and the fake listener within the current event loop
+    """
+
+    def __init__(self, authenticate: typing.Callable = authenticate_none, **serve_kwargs):
+        """ Prepares the harness
+
+        :param authenticate: authentication method used during the handshake
+        :param serve_kwargs: additional arguments of websockets.serve()
+        """
+        self.authentication_chain = AuthenticationChain([authenticate])
+        self.serve_kwargs = serve_kwargs
+        self.serve_kwargs.setdefault("subprotocols", SUBPROTOCOLS)
+        self.listener: typing.Optional[FakeListener] = None
+        self.server: typing.Optional[websockets.WebSocketServer] = None
+        self.clients: typing.List[Client] = []
+        self.port: int = 0
+
+    async def __aenter__(self) -> "Harness":
+        # the global connections were created outside of the loop of the test
+        connections.current_event_loop = asyncio.get_running_loop()
+        self.listener = make_bus_listener(FakeListener)
+        self.server = await websockets.serve(
+            connection_handler,
+            HOST,
+            0,
+            process_request=make_process_request(self.authentication_chain.authenticate),
+            **self.serve_kwargs,
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.gather(*[client.close() for client in self.clients])
+        self.server.close()
+        await self.server.wait_closed()
+        self.listener.disconnect()
+        self.authentication_chain.shutdown()
+
+    @property
+    def url(self) -> str:
+        return "ws://%s:%d/" % (HOST, self.port)
+
+    async def connect(self, **kwargs) -> Client:
+        """ Connects a new client
+
+        :param kwargs: arguments of websockets.connect() (e.g. extra_headers)
+        :returns: connected client
+        """
+        client = Client(await websockets.connect(self.url, **kwargs))
+        self.clients.append(client)
+        return client
+
+    def notify(
+        self,
+        module: str,
+        action: str,
+        data: typing.Optional[dict] = None,
+        controller_id: typing.Optional[str] = None,
+    ):
+        """ Injects a notification as if it was received from the bus
+        """
+        notification = {"module": module, "action": action, "kind": "notification"}
+        if data is not None:
+            notification["data"] = data
+        self.listener.notify(notification, controller_id)
@@ -0,0 +1,93 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import time
+
+from http import HTTPStatus
+from websockets.http import Headers
+
+from foris_ws.authentication import ubus
+from foris_ws.authentication.cache import SessionCache
+
+DENIED = HTTPStatus.FORBIDDEN, Headers([]), b"Session not found"
+
+
+def test_cache_ttl():
+    cache = SessionCache(ttl=60, negative_ttl=0.05, max_size=10)
+    cache.set("granted", None, True)
+    cache.set("denied", DENIED, False)
+    assert cache.get("granted") == (True, None)
+    assert cache.get("denied") == (True, DENIED)
+    time.sleep(0.1)
+    assert cache.get("granted") == (True, None)
+    assert cache.get("denied") == (False, None)
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_cache_size():
+    cache = SessionCache(ttl=60, negative_ttl=60, max_size=3)
+    for i in range(5):
+        cache.set(i, None, True)
+    assert len(cache) == 3
+    assert cache.get(0) == (False, None)
+    assert cache.get(4) == (True, None)
+
+
+def test_cache_disabled():
+    cache = SessionCache()
+    cache.set("granted", None, True)
+    assert not cache.enabled
+    assert cache.get("granted") == (False, None)
+
+
+def test_ubus_authenticate_cached(monkeypatch):
+    calls = []
+
+    def check_session_access(session_id):
+        calls.append(session_id)
+        return None if session_id == "good" else DENIED
+
+    monkeypatch.setattr(ubus, "_check_session_access", check_session_access)
+    ubus.session_cache.configure(60, 60, 10)
+    try:
+        for _ in range(3):
+            assert ubus.authenticate("/", Headers([("Cookie", "foris.ws.session=good")])) is None
+            assert ubus.authenticate("/", Headers([("Cookie", "foris.ws.session=bad")])) == DENIED
+    finally:
+        ubus.session_cache.configure(0, 0, 256)
+    assert calls == ["good", "bad"]
+
+
+def test_ubus_unavailable_not_cached(monkeypatch):
+    calls = []
+
+    def check_session_access(session_id):
+        calls.append(session_id)
+        return ubus.UNAVAILABLE
+
+    monkeypatch.setattr(ubus, "_check_session_access", check_session_access)
+    ubus.session_cache.configure(60, 60, 10)
+    try:
+        for _ in range(2):
+            res = ubus.authenticate("/", Headers([("Cookie", "foris.ws.session=good")]))
+            assert res == ubus.UNAVAILABLE
+    finally:
+        ubus.session_cache.configure(0, 0, 256)
+    assert calls == ["good", "good"]
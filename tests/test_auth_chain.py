@@ -0,0 +1,142 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import threading
+import time
+
+from http import HTTPStatus
+from websockets.http import Headers
+
+from foris_ws.authentication.chain import AuthenticationChain
+
+DENIED = HTTPStatus.FORBIDDEN, Headers([]), b"Denied"
+DENIED_OTHER = HTTPStatus.FORBIDDEN, Headers([]), b"Denied other"
+UNAVAILABLE = HTTPStatus.SERVICE_UNAVAILABLE, Headers([]), b"Unavailable"
+
+
+def grant(path, request_headers):
+    return None
+
+
+def slow_grant(path, request_headers):
+    time.sleep(0.2)
+    return None
+
+
+def deny(path, request_headers):
+    return DENIED
+
+
+def unavailable(path, request_headers):
+    return UNAVAILABLE
+
+
+def deny_other(path, request_headers):
+    time.sleep(0.1)
+    return DENIED_OTHER
+
+
+def test_chain_results():
+    async def run(methods):
+        return await AuthenticationChain(methods).authenticate("/", Headers([]))
+
+    assert asyncio.run(run([])) is None
+    assert asyncio.run(run([deny])) == DENIED
+    assert asyncio.run(run([deny, slow_grant])) is None
+    assert asyncio.run(run([slow_grant, deny])) is None
+    # error from the last method is returned
+    assert asyncio.run(run([unavailable, deny])) == DENIED
+    assert asyncio.run(run([unavailable, grant])) is None
+
+
+def test_chain_does_not_block_loop():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await AuthenticationChain([slow_grant]).authenticate("/", Headers([]))
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 5
+
+
+def test_concurrent_chain():
+    async def run(methods):
+        chain = AuthenticationChain(methods, concurrent=True)
+        start = time.monotonic()
+        res = await chain.authenticate("/", Headers([]))
+        return res, time.monotonic() - start
+
+    res, duration = asyncio.run(run([slow_grant, slow_grant, deny]))
+    assert res is None
+    assert duration < 0.35
+
+    res, _ = asyncio.run(run([slow_grant, grant]))
+    assert res is None
+
+    res, _ = asyncio.run(run([deny, deny_other]))
+    assert res == DENIED_OTHER
+
+    res, _ = asyncio.run(run([unavailable, deny_other]))
+    assert res == DENIED_OTHER
+
+
+def test_verify_unavailable():
+    async def run(methods, concurrent=False):
+        chain = AuthenticationChain(methods, concurrent=concurrent)
+        return await chain.verify("/", Headers([]))
+
+    assert asyncio.run(run([deny])) == (DENIED, False)
+    assert asyncio.run(run([unavailable, deny])) == (DENIED, True)
+    assert asyncio.run(run([unavailable, grant])) == (None, False)
+    assert asyncio.run(run([unavailable, deny_other], True)) == (DENIED_OTHER, True)
+
+
+def test_concurrent_chain_stalled_method():
+    release = threading.Event()
+
+    def stall(path, request_headers):
+        release.wait(5)
+        return DENIED
+
+    async def run():
+        chain = AuthenticationChain([stall, grant], max_workers=2, concurrent=True)
+        try:
+            start = time.monotonic()
+            # stalled checks keep running after the grant, so their pool gets saturated
+            results = await asyncio.gather(
+                *[chain.authenticate("/", Headers([])) for _ in range(6)]
+            )
+            return results, time.monotonic() - start
+        finally:
+            release.set()
+            chain.shutdown()
+
+    results, duration = asyncio.run(run())
+    assert results == [None] * 6
+    # the granting method doesn't wait for the stalled one
+    assert duration < 0.5
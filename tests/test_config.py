@@ -0,0 +1,170 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import json
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import websockets
+
+from foris_ws.__main__ import parse_options
+from foris_ws.config import changed_options
+
+from .harness import Harness
+
+HOST = "127.0.0.1"
+
+
+def write_config(path, **options):
+    with open(path, "w") as f:
+        json.dump(options, f)
+
+
+def test_config_file(tmp_path):
+    path = str(tmp_path / "config.json")
+    write_config(path, **{"authentication": "none", "host": HOST, "port": 9000, "max-queue": 4})
+
+    options = parse_options(["-c", path, "unix-socket"])
+    assert options.authentication == ["none"]
+    assert (options.host, options.port, options.max_queue) == (HOST, 9000, 4)
+
+    # command line takes precedence
+    options = parse_options(["-c", path, "--port", "9001", "--max-queue", "8", "unix-socket"])
+    assert (options.port, options.max_queue) == (9001, 8)
+
+
+def test_priorities_config(tmp_path):
+    path = str(tmp_path / "config.json")
+    write_config(path, priority=["maintain=10", "wifi=-1"])
+    options = parse_options(
+        ["-c", path, "-a", "none", "--host", HOST, "--port", "9000", "--priority", "wifi=1", "unix-socket"]
+    )
+    assert dict(options.priority) == {"maintain": 10, "wifi": 1}
+
+    # a single value doesn't need to be in a list
+    write_config(path, priority="maintain=10")
+    options = parse_options(["-c", path, "-a", "none", "--host", HOST, "--port", "9000", "unix-socket"])
+    assert dict(options.priority) == {"maintain": 10}
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"unknown": 1},
+        {"port": "9000"},
+        {"authentication": ["nobody"]},
+        {"auth-concurrent": 1},
+        {"priority": ["maintain"]},
+    ],
+)
+def test_invalid_config(tmp_path, config):
+    path = str(tmp_path / "config.json")
+    write_config(path, **config)
+    with pytest.raises(SystemExit):
+        parse_options(["-c", path, "-a", "none", "--host", HOST, "--port", "9000", "unix-socket"])
+
+
+def test_required_options():
+    with pytest.raises(SystemExit):
+        parse_options(["-a", "none", "--host", HOST, "unix-socket"])
+
+
+def test_changed_options():
+    old = parse_options(["-a", "none", "--host", HOST, "--port", "9000", "unix-socket"])
+    new = parse_options(
+        ["-a", "filesystem", "--host", HOST, "--port", "9001", "--max-size", "10", "unix-socket"]
+    )
+    assert changed_options(old, new) == ({"authentication", "max_size"}, {"port"})
+
+
+def test_set_limits():
+    async def test():
+        async with Harness() as harness:
+            from foris_ws.connection import connections
+
+            client = await harness.connect()
+            await client.request({"action": "subscribe", "params": ["web"]})
+            connections.set_limits(max_size=100)
+            # a new limit applies to the active connection (from the next message)
+            # and the subscriptions are kept
+            harness.notify("web", "test")
+            assert (await client.recv())["module"] == "web"
+            await client.request({"action": "subscribe", "params": ["about"]})
+            await client.send({"action": "subscribe", "params": ["x" * 200]})
+            with pytest.raises(websockets.ConnectionClosed):
+                await client.recv()
+            connections.set_limits()
+
+    asyncio.run(test())
+
+
+def test_reload_keeps_connections(tmp_path):
+    path = str(tmp_path / "config.json")
+    recording = tmp_path / "empty.jsonl"
+    recording.write_text("")
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        port = s.getsockname()[1]
+    write_config(path, authentication=["none"], host=HOST, port=port)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "foris_ws", "-c", path, "replay", "--file", str(recording)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    async def test():
+        url = "ws://%s:%d/" % (HOST, port)
+        for _ in range(100):
+            try:
+                client = await websockets.connect(url)
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        await client.send(json.dumps({"action": "subscribe", "params": ["web"]}))
+        await client.recv()
+
+        write_config(
+            path, authentication=["filesystem"], host=HOST, port=port, priority="maintain=10"
+        )
+        server.send_signal(signal.SIGHUP)
+        start = time.monotonic()
+        while time.monotonic() - start < 5:
+            try:
+                await (await websockets.connect(url)).close()
+                await asyncio.sleep(0.05)
+            except websockets.InvalidStatusCode:
+                break  # new connections are authenticated using the new method
+        else:
+            assert False, "configuration was not reloaded"
+
+        await client.send(json.dumps({"action": "subscribe", "params": ["about"]}))
+        assert set(json.loads(await client.recv())["subscriptions"]) == {"web", "about"}
+        await client.close()
+
+    try:
+        asyncio.run(asyncio.wait_for(test(), 10))
+    finally:
+        server.terminate()
+        server.wait()
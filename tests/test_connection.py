@@ -0,0 +1,157 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import json
+import logging
+import sys
+
+from foris_ws.connection import (
+    Connection,
+    Connections,
+    OutboundQueue,
+    estimate_connection_memory,
+)
+
+from .harness import FakeHandler
+
+
+def test_subscription_sets_are_shared():
+    first = Connection(1, FakeHandler())
+    second = Connection(2, FakeHandler())
+    first._subscribe(["testa", "testb"])
+    second._subscribe(["testb"])
+    second._subscribe("testa")
+    assert first.modules == {"testa", "testb"}
+    assert first.modules is second.modules
+
+    second._unsubscribe(["testa"])
+    assert first.modules == {"testa", "testb"}
+    assert second.modules == {"testb"}
+    second._unsubscribe(["testb"])
+    assert not second.modules
+
+
+def test_connection_has_no_dict():
+    connection = Connection(1, FakeHandler())
+    assert not hasattr(connection, "__dict__")
+    # the record and the (shared) empty subscription set
+    assert connection.memory_footprint() <= 512
+
+
+def test_process_message():
+    handler = FakeHandler()
+    connection = Connection(1, handler)
+
+    asyncio.run(connection.process_message(json.dumps({"action": "subscribe", "params": ["a"]})))
+    assert handler.sent[-1] == {"result": True, "subscriptions": ["a"]}
+
+    asyncio.run(connection.process_message("rgh"))
+    assert handler.sent[-1] == {"result": False, "error": "Not in json format."}
+
+
+def test_memory_footprint():
+    async def run():
+        connections = Connections()
+        empty = connections.memory_footprint()
+        for _ in range(10):
+            client_id = await connections.register_connection(FakeHandler())
+            connections._connections[client_id]._subscribe(["testa", "testb"])
+        records = list(connections._connections.values())
+        # all the connections share the same subscription set which is counted only once
+        assert len({id(e.modules) for e in records}) == 1
+        shared = sys.getsizeof(connections._connections) + sys.getsizeof(records[0].modules)
+        assert connections.memory_footprint() == shared + sum(sys.getsizeof(e) for e in records)
+        return empty, connections.memory_footprint()
+
+    empty, used = asyncio.run(run())
+    assert used > empty
+
+
+def test_trace_sample(caplog):
+    async def run():
+        connections = Connections()
+        connections.trace_sample = 3
+        client_id = await connections.register_connection(FakeHandler())
+        connections._connections[client_id]._subscribe(["testa"])
+        for i in range(7):
+            connections.publish_notification("id", "testa", {"module": "testa", "action": str(i)})
+        await asyncio.sleep(0.01)
+
+    with caplog.at_level(logging.INFO, logger="foris_ws.trace"):
+        asyncio.run(run())
+    traces = [json.loads(e.getMessage()) for e in caplog.records if e.name == "foris_ws.trace"]
+    assert [e["action"] for e in traces] == ["2", "5"]
+    assert traces[0]["subscribers"] == 1
+    assert traces[0]["failed"] == 0
+    assert traces[0]["slowest"] >= traces[0]["dispatch"]
+
+
+def test_outbound_queue():
+    queue = OutboundQueue()
+    for i in range(20):
+        queue.push(0, "low%d" % i)
+    for i in range(20):
+        queue.push(10, "high%d" % i)
+    queue.push(5, "mid")
+
+    order = [queue.pop()[0] for _ in range(len(queue))]
+    assert not queue.lanes and not queue.skipped
+    # higher priorities overtake but the waiting lanes are not starved
+    assert order[: OutboundQueue.FAIRNESS_LIMIT] == ["high%d" % i for i in range(8)]
+    assert set(order[8:10]) == {"mid", "low0"}
+    assert order.index("high19") < order.index("low5")
+    # the order within a lane is kept
+    assert [e for e in order if e.startswith("low")] == ["low%d" % i for i in range(20)]
+
+
+def test_priorities():
+    class BlockingHandler(FakeHandler):
+        def __init__(self):
+            super().__init__()
+            self.release = asyncio.Event()
+
+        async def send(self, msg):
+            await self.release.wait()
+            await super().send(msg)
+
+    async def run():
+        connections = Connections()
+        connections.priorities = {"maintain": 10}
+        handler = BlockingHandler()
+        client_id = await connections.register_connection(handler)
+        connections._connections[client_id]._subscribe(["maintain", "wifi"])
+        for i in range(3):
+            connections.publish_notification("id", "wifi", {"module": "wifi", "action": str(i)})
+        await asyncio.sleep(0.01)  # first one is being sent
+        connections.publish_notification("id", "maintain", {"module": "maintain"})
+        await asyncio.sleep(0.01)
+        handler.release.set()
+        await asyncio.sleep(0.01)
+        assert connections._connections[client_id].pending == 0
+        assert connections._connections[client_id].outbound is None
+        return handler.sent
+
+    sent = asyncio.run(run())
+    assert [e["module"] + e.get("action", "") for e in sent] == [
+        "wifi0",
+        "maintain",
+        "wifi1",
+        "wifi2",
+    ]
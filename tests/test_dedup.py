@@ -0,0 +1,69 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+
+from foris_ws import bus_listener, metrics
+from foris_ws.dedup import Deduplicator
+
+from .harness import Harness
+
+
+def test_deduplicator():
+    dedup = Deduplicator(window=1.0, max_size=2)
+    notification = {"module": "wifi", "action": "update", "data": {"a": 1, "b": 2}}
+    assert not dedup.is_duplicate(notification, "ID", now=0.0)
+    # the same content in a different key order
+    repeated = {"data": {"b": 2, "a": 1}, "action": "update", "module": "wifi"}
+    assert dedup.is_duplicate(repeated, "ID", now=0.5)
+    # the window is not extended by suppressed repeats
+    assert not dedup.is_duplicate(notification, "ID", now=1.2)
+    assert dedup.suppressed == 1
+
+    # different data, controller or action are not repeats
+    assert not dedup.is_duplicate(dict(notification, data={"a": 2}), "ID", now=1.3)
+    assert not dedup.is_duplicate(notification, "ID", now=1.4)
+    assert not dedup.is_duplicate(notification, "OTHER", now=1.5)
+    assert not dedup.is_duplicate(dict(notification, action="set"), "ID", now=1.6)
+
+    # bounded number of tracked keys (the least recently used one was dropped)
+    assert len(dedup) == 2
+    assert dedup.is_duplicate(notification, "OTHER", now=1.7)
+    assert not dedup.is_duplicate(notification, "ID", now=1.8)
+
+
+def test_deduplicated_handler():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect()
+            await client.request({"action": "subscribe", "params": ["wifi"]})
+            for i in range(3):
+                harness.notify("wifi", "update", {"enabled": True})
+            harness.notify("wifi", "update", {"enabled": False})
+            assert (await client.recv())["data"] == {"enabled": True}
+            assert (await client.recv())["data"] == {"enabled": False}
+            await client.assert_silent()
+
+    suppressed = metrics.notifications_suppressed.value("wifi")
+    bus_listener.deduplicator = Deduplicator(window=60.0)
+    try:
+        asyncio.run(test())
+    finally:
+        bus_listener.deduplicator = None
+    assert metrics.notifications_suppressed.value("wifi") == suppressed + 2
@@ -0,0 +1,60 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import logging
+import time
+
+from foris_ws import loop_monitor
+from foris_ws.loop_monitor import LoopLagMonitor, enable_slow_callback_detection, percentile
+
+
+def test_percentile():
+    samples = [float(e) for e in range(1, 101)]
+    assert percentile(samples, 0.5) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_lag_monitor():
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def run():
+        task = asyncio.ensure_future(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    statistics = monitor.statistics()
+    assert statistics["max"] >= 0.05
+    assert statistics["p50"] < statistics["max"]
+
+
+def test_slow_callback(monkeypatch, caplog):
+    monkeypatch.setattr(asyncio.events.Handle, "_run", asyncio.events.Handle._run)
+    enable_slow_callback_detection(0.05)
+
+    async def blocking_coroutine():
+        time.sleep(0.1)
+
+    with caplog.at_level(logging.WARNING, logger=loop_monitor.__name__):
+        asyncio.run(blocking_coroutine())
+    assert "blocking_coroutine" in caplog.text
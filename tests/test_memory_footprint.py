@@ -0,0 +1,105 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import websockets
+
+from foris_ws.authentication.chain import AuthenticationChain
+from foris_ws.authentication.none import authenticate
+from foris_ws.connection import connections
+from foris_ws.ws_handling import connection_handler, make_process_request
+
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "memory_budget.json")
+HOST = "127.0.0.1"
+
+# opens idle subscribed connections and keeps them open till stdin is closed
+CLIENTS = """
+import asyncio, json, sys, websockets
+
+async def main(url, count):
+    clients = []
+    for _ in range(count):
+        ws = await websockets.connect(url)
+        await ws.send(json.dumps({"action": "subscribe", "params": ["about", "web", "updater"]}))
+        await ws.recv()
+        clients.append(ws)
+    print("ready", flush=True)
+    await asyncio.get_running_loop().run_in_executor(None, sys.stdin.read)
+    await asyncio.gather(*[ws.close() for ws in clients])
+
+asyncio.run(main(sys.argv[1], int(sys.argv[2])))
+"""
+
+
+def test_memory_per_connection():
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+    count = budget["connections"]
+
+    async def run():
+        server = await websockets.serve(
+            connection_handler,
+            HOST,
+            0,
+            process_request=make_process_request(AuthenticationChain([authenticate]).authenticate),
+        )
+        port = server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+        clients = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            CLIENTS,
+            "ws://%s:%d/" % (HOST, port),
+            str(count),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        assert (await clients.stdout.readline()).strip() == b"ready"
+        await asyncio.sleep(0.1)
+        assert len(connections._connections) == count
+
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        clients.stdin.close()
+        await clients.wait()
+        server.close()
+        await server.wait_closed()
+        await loop.shutdown_default_executor()
+
+        return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    per_connection = asyncio.run(run()) / count
+    assert per_connection <= budget["bytes_per_connection"], (
+        "Memory per idle connection %d B exceeds the budget %d B"
+        % (per_connection, budget["bytes_per_connection"])
+    )
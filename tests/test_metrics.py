@@ -0,0 +1,193 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import json
+
+import websockets
+
+from http import HTTPStatus
+from websockets.http import Headers
+
+from foris_ws import metrics
+from foris_ws.connection import Connections, connections as active_connections
+from foris_ws.ws_handling import (
+    ServerProtocol,
+    connection_handler,
+    is_local_address,
+    make_process_request,
+)
+
+from .harness import FakeHandler
+
+DENIED = HTTPStatus.FORBIDDEN, Headers([]), b"Denied"
+
+
+def test_render():
+    registry = metrics.Registry()
+    counter = registry.counter("test_total", "Test counter.", ["kind"])
+    histogram = registry.histogram("test_seconds", "Test histogram.", buckets=[0.1, 1.0])
+    registry.gauge("test_gauge", "Test gauge.", lambda: 3)
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_total counter" in lines
+    assert 'test_total{kind="a\\"b"} 3' in lines
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_count 3" in lines
+    assert "test_seconds_sum 5.55" in lines
+    assert "test_gauge 3" in lines
+
+
+def test_fan_out_metrics():
+    async def run():
+        connections = Connections()
+        handlers = [FakeHandler() for _ in range(3)]
+        for handler in handlers:
+            client_id = await connections.register_connection(handler)
+            connections._connections[client_id]._subscribe(["testa"])
+        connections._connections[client_id]._subscribe(["testb"])
+
+        connections.publish_notification("id", "testa", {"module": "testa"})
+        connections.publish_notification("id", "testb", {"module": "testb"})
+        await asyncio.sleep(0.01)
+        assert connections.subscription_counts() == {"testa": 3, "testb": 1}
+        assert all(e.pending == 0 for e in connections._connections.values())
+        return handlers
+
+    sent = metrics.messages_sent.value()
+    handlers = asyncio.run(run())
+    assert [len(e.sent) for e in handlers] == [1, 1, 2]
+    assert handlers[0].sent[0] == {"module": "testa", "controller_id": "id"}
+    assert metrics.messages_sent.value() == sent + 4
+
+
+def test_metrics_endpoint():
+    async def deny(path, request_headers):
+        return DENIED
+
+    async def run(no_auth, path, remote_address=("127.0.0.1", 4444)):
+        process_request = make_process_request(deny, "/metrics", no_auth)
+        return await process_request(path, Headers([]), remote_address)
+
+    status, _, body = asyncio.run(run(True, "/metrics"))
+    assert status == HTTPStatus.OK
+    assert b"foris_ws_connections" in body
+    assert b"foris_ws_connection_records_bytes" in body
+    assert asyncio.run(run(False, "/metrics")) == DENIED
+    assert asyncio.run(run(True, "/")) == DENIED
+    # authentication is skipped only for local peers
+    assert asyncio.run(run(True, "/metrics", ("192.168.1.10", 4444))) == DENIED
+    assert asyncio.run(run(True, "/metrics", None)) == DENIED
+
+
+def test_server_protocol_passes_peer():
+    async def deny(path, request_headers):
+        return DENIED
+
+    async def run():
+        server = await websockets.serve(
+            connection_handler,
+            "127.0.0.1",
+            0,
+            process_request=make_process_request(deny, "/metrics", True),
+            create_protocol=ServerProtocol,
+        )
+        try:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            status_line = await reader.readline()
+            writer.close()
+            return status_line
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 200")
+
+
+def test_is_local_address():
+    assert is_local_address("127.0.0.1")
+    assert is_local_address("::1")
+    assert is_local_address("::ffff:127.0.0.1")
+    assert is_local_address("localhost")
+    assert not is_local_address("0.0.0.0")
+    assert not is_local_address("192.168.1.1")
+
+
+def test_delivery_latency():
+    class SlowHandler(FakeHandler):
+        async def send(self, msg):
+            await asyncio.sleep(0.05)
+            await super().send(msg)
+
+    async def run():
+        connections = Connections()
+        for handler in [FakeHandler(), SlowHandler()]:
+            client_id = await connections.register_connection(handler)
+            connections._connections[client_id]._subscribe(["latency"])
+        connections.publish_notification("id", "latency", {"module": "latency"})
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert metrics.delivery_latency.count("latency") == 2
+    assert metrics.slowest_delivery_latency.count("latency") == 1
+    assert 'foris_ws_slowest_delivery_latency_seconds_bucket{module="latency",le="0.025"} 0' in (
+        metrics.registry.render().splitlines()
+    )
+
+
+def test_admin_endpoint():
+    async def deny(path, request_headers):
+        return DENIED
+
+    async def run(no_auth):
+        connections = active_connections
+        handler = FakeHandler()
+        handler.remote_address = ("127.0.0.1", 4444)
+        client_id = await connections.register_connection(handler)
+        try:
+            await connections.handle_message(
+                client_id, json.dumps({"action": "subscribe", "params": ["admin"]})
+            )
+            process_request = make_process_request(deny, None, no_auth, "/admin")
+            return client_id, await process_request("/admin", Headers([]), handler.remote_address)
+        finally:
+            connections.remove_connection(client_id)
+
+    client_id, (status, _, body) = asyncio.run(run(True))
+    assert status == HTTPStatus.OK
+    data = json.loads(body)
+    assert data["subscriptions"] == {"admin": 1}
+    connection = [e for e in data["connections"] if e["client_id"] == client_id][0]
+    assert connection["peer"] == "127.0.0.1:4444"
+    assert connection["subscriptions"] == ["admin"]
+    assert connection["bytes_sent"] > 0
+    assert connection["last_activity"] >= connection["connected_at"]
+
+    # authentication is required unless it is explicitly disabled
+    _, res = asyncio.run(run(False))
+    assert res == DENIED
@@ -0,0 +1,76 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+import tracemalloc
+
+from foris_ws.connection import Connection
+from foris_ws.profiling import Profiler
+
+
+def test_profiler(tmp_path):
+    profiler = Profiler(str(tmp_path), duration=0.05)
+
+    async def run():
+        profiler.trigger()
+        profiler.trigger()  # ignored when running
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert profiler.profile is None
+    assert not tracemalloc.is_tracing()
+    files = sorted(e.suffix for e in tmp_path.iterdir())
+    assert files == [".prof", ".tracemalloc", ".txt"]
+    summary = next(tmp_path.glob("*.txt")).read_text()
+    assert "== CPU (event loop thread, sorted by cumulative time) ==" in summary
+    assert "== Memory by module ==" in summary
+
+
+def test_profiler_tracing_since_startup(tmp_path):
+    profiler = Profiler(str(tmp_path), duration=0.05)
+    profiler.start_tracing()
+    try:
+        # allocated before the profiling was triggered
+        records = [Connection(i, None) for i in range(100)]
+
+        async def run():
+            profiler.trigger()
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        # tracing started outside of the profiler is kept running
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    summary = next(tmp_path.glob("*.txt")).read_text()
+    assert "connection.py" in summary
+    assert len(records) == 100
+
+
+def test_profiler_write_failure(tmp_path):
+    profiler = Profiler(str(tmp_path / "missing"), duration=0.05)
+
+    async def run():
+        profiler.trigger()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    # results are lost but the profiling can be triggered again
+    assert profiler.profile is None
+    assert not tracemalloc.is_tracing()
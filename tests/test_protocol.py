@@ -0,0 +1,200 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+
+import pytest
+import websockets
+
+from foris_ws.connection import PROTOCOL_V2
+
+from .harness import Harness, ID
+
+
+def run(coro):
+    asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_incorrect_input():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect()
+            for message, error in [
+                ("rgh", "Not in json format."),
+                ({}, "Action not defined."),
+                ({"action": "subscribe"}, "Params not defined."),
+                ({"action": "unkonwn", "params": ["web"]}, "Unknown action 'unkonwn'"),
+            ]:
+                assert await client.request(message) == {"result": False, "error": error}
+
+    run(test())
+
+
+def test_subscribe_and_unsubscribe():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect()
+            res = await client.request(
+                {"action": "subscribe", "params": ["test1", "test2", "test3"]}
+            )
+            assert res["result"] is True
+            assert set(res["subscriptions"]) == {"test1", "test2", "test3"}
+            res = await client.request({"action": "unsubscribe", "params": ["test1", "test3"]})
+            assert res["result"] is True
+            assert set(res["subscriptions"]) == {"test2"}
+
+    run(test())
+
+
+def test_notification():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect()
+            await client.request({"action": "subscribe", "params": ["testa", "testb", "testc"]})
+
+            harness.notify("testa", "testa", {"test": "a"})
+            assert await client.recv() == {
+                "action": "testa",
+                "data": {"test": "a"},
+                "kind": "notification",
+                "module": "testa",
+                "controller_id": ID,
+            }
+
+            harness.notify("testd", "testd", {"test": "d"})
+            harness.notify("testb", "testb", {"test": "b"})
+            assert (await client.recv())["module"] == "testb"
+
+            await client.request({"action": "subscribe", "params": ["testd"]})
+            await client.request({"action": "unsubscribe", "params": ["testc"]})
+            harness.notify("testc", "testc", {"test": "c"})
+            harness.notify("testd", "testd", {"test": "d"})
+            assert (await client.recv())["module"] == "testd"
+            await client.assert_silent()
+
+    run(test())
+
+
+def test_notification_fan_out():
+    async def test():
+        async with Harness() as harness:
+            first = await harness.connect()
+            second = await harness.connect()
+            await first.request({"action": "subscribe", "params": ["web"]})
+            await second.request({"action": "subscribe", "params": ["web", "about"]})
+
+            harness.notify("about", "get", controller_id="OTHER")
+            harness.notify("web", "set_language", {"language": "cs"})
+            assert (await second.recv())["controller_id"] == "OTHER"
+            for client in (first, second):
+                res = await client.recv()
+                assert res["module"] == "web"
+                assert res["data"] == {"language": "cs"}
+            await first.assert_silent()
+
+    run(test())
+
+
+def test_authentication_failure():
+    def reject(path, request_headers):
+        return 403, [], b"Forbidden"
+
+    async def test():
+        async with Harness(reject) as harness:
+            with pytest.raises(websockets.InvalidStatusCode):
+                await harness.connect()
+
+    run(test())
+
+
+def test_protocol_v2():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect(subprotocols=[PROTOCOL_V2])
+            assert client.websocket.subprotocol == PROTOCOL_V2
+
+            # pipelined operations in a single frame are answered with deltas
+            res = await client.request(
+                {
+                    "id": 1,
+                    "ops": [
+                        {"action": "subscribe", "params": ["web", "about", "updater"]},
+                        {"action": "unsubscribe", "params": ["updater"]},
+                    ],
+                }
+            )
+            assert res == {"id": 1, "result": True, "subscribed": ["about", "web"]}
+
+            # several requests can be sent without waiting for the replies
+            await client.send({"id": 2, "action": "subscribe", "params": ["web"]})
+            await client.send({"id": 3, "action": "unsubscribe", "params": ["about", "x"]})
+            await client.send({"id": "4", "action": "list"})
+            assert await client.recv() == {"id": 2, "result": True}
+            assert await client.recv() == {"id": 3, "result": True, "unsubscribed": ["about"]}
+            assert await client.recv() == {"id": "4", "result": True, "subscriptions": ["web"]}
+
+            harness.notify("web", "set_language")
+            assert (await client.recv())["module"] == "web"
+
+    run(test())
+
+
+def test_protocol_v2_errors():
+    async def test():
+        async with Harness() as harness:
+            client = await harness.connect(subprotocols=[PROTOCOL_V2])
+            for message, error in [
+                ("rgh", "Not in json format."),
+                ("[]", "Not a json object."),
+                ({"id": 1, "ops": {}}, "Ops are not a list of json objects."),
+                ({"id": 2, "action": "subscribe"}, "Params not defined."),
+                ({"id": 3, "action": "unkonwn", "params": []}, "Unknown action 'unkonwn'"),
+            ]:
+                res = await client.request(message)
+                assert res["result"] is False and res["error"] == error
+                if isinstance(message, dict):
+                    assert res["id"] == message["id"]
+
+            # nothing is applied when any of the operations is not valid
+            res = await client.request(
+                {
+                    "id": 4,
+                    "ops": [{"action": "subscribe", "params": ["web"]}, {"action": "subscribe"}],
+                }
+            )
+            assert res == {"id": 4, "result": False, "error": "Params not defined."}
+            assert await client.request({"id": 5, "action": "list"}) == {
+                "id": 5,
+                "result": True,
+                "subscriptions": [],
+            }
+
+    run(test())
+
+
+def test_protocol_negotiation():
+    async def test():
+        async with Harness() as harness:
+            # clients which don't offer the subprotocol keep using the original protocol
+            client = await harness.connect()
+            assert client.websocket.subprotocol is None
+            res = await client.request({"id": 1, "action": "subscribe", "params": ["web"]})
+            assert res == {"result": True, "subscriptions": ["web"]}
+
+    run(test())
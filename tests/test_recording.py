@@ -0,0 +1,77 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import threading
+import time
+
+from foris_ws.recording import NotificationRecorder, ReplayListener, read_recording
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    recorder = NotificationRecorder(path)
+    now = time.time()
+    for i in range(3):
+        recorder.record({"module": "test", "action": str(i)}, "ID", now + i * 0.1)
+    recorder.close()
+    with open(path, "a") as f:
+        f.write('{"t": 1, "c"')  # unfinished record
+
+    assert [e[2]["action"] for e in read_recording(path)] == ["0", "1", "2"]
+
+    replayed = []
+    listener = ReplayListener(lambda n, c: replayed.append((time.monotonic(), c, n)), path)
+    assert listener.listen() == 3
+    assert [e[1] for e in replayed] == ["ID"] * 3
+    assert replayed[-1][0] - replayed[0][0] >= 0.18
+
+    replayed.clear()
+    listener = ReplayListener(lambda n, c: replayed.append(time.monotonic()), path, speed=0)
+    assert listener.listen() == 3
+    assert replayed[-1] - replayed[0] < 0.05
+
+
+def test_replay_disconnect(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    recorder = NotificationRecorder(path)
+    recorder.record({"module": "test"}, "ID", 0)
+    recorder.record({"module": "test"}, "ID", 100)
+    recorder.close()
+
+    listener = ReplayListener(lambda n, c: None, path, repeat=True)
+    threading.Timer(0.1, listener.disconnect).start()
+    start = time.monotonic()
+    assert listener.listen() == 1
+    assert time.monotonic() - start < 1
+
+
+def test_repeat_empty_recording(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text('{"t": 1, "c"\n')  # no valid record
+
+    listener = ReplayListener(lambda n, c: None, str(path), repeat=True)
+    timer = threading.Timer(1, listener.disconnect)
+    timer.start()
+    start = time.monotonic()
+    try:
+        assert listener.listen() == 0
+    finally:
+        timer.cancel()
+    # returned without waiting for disconnect()
+    assert time.monotonic() - start < 0.5
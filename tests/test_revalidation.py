@@ -0,0 +1,135 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import asyncio
+
+from http import HTTPStatus
+from websockets.http import Headers
+
+from foris_ws import metrics
+from foris_ws.authentication import ubus
+from foris_ws.authentication.chain import AuthenticationChain
+from foris_ws.connection import Connections
+from foris_ws.revalidation import SessionRevalidator
+
+from .harness import FakeHandler
+
+DENIED = HTTPStatus.FORBIDDEN, Headers([]), b"Session not found"
+
+
+def test_sweep():
+    checked = []
+
+    async def verify(path, request_headers):
+        checked.append(request_headers["Cookie"])
+        return (DENIED if "expired" in request_headers["Cookie"] else None), False
+
+    async def run():
+        connections = Connections()
+        handlers = []
+        sessions = ["valid", "expired", "valid", "expired", "other"] + ["x%d" % i for i in range(5)]
+        for session in sessions:
+            handler = FakeHandler(session)
+            handlers.append(handler)
+            await connections.register_connection(handler)
+
+        revalidator = SessionRevalidator(connections, verify, max_sessions=4)
+        closed = await revalidator.sweep()
+        closed += await revalidator.sweep()
+        return handlers, closed
+
+    handlers, closed = asyncio.run(run())
+    assert closed == 2
+    assert [e.closed for e in handlers[:5]] == [False, True, False, True, False]
+    # each session is verified once
+    assert len(checked) == len(set(checked)) == 8
+
+
+def test_sweep_backend_failure():
+    async def verify(path, request_headers):
+        if "broken" in request_headers["Cookie"]:
+            raise RuntimeError("backend failed")
+        # denied by the last method, but the other one could not decide
+        return DENIED, True
+
+    async def run():
+        connections = Connections()
+        handlers = [FakeHandler("unknown"), FakeHandler("broken")]
+        for handler in handlers:
+            await connections.register_connection(handler)
+
+        revalidator = SessionRevalidator(connections, verify)
+        return handlers, await revalidator.sweep()
+
+    handlers, closed = asyncio.run(run())
+    # the sessions could not be verified -> clients are kept
+    assert closed == 0
+    assert not any(e.closed for e in handlers)
+
+
+def test_sweep_not_counted_as_handshake():
+    def deny(path, request_headers):
+        return DENIED
+
+    async def run():
+        connections = Connections()
+        handler = FakeHandler("expired")
+        await connections.register_connection(handler)
+
+        chain = AuthenticationChain([deny])
+        try:
+            return handler, await SessionRevalidator(connections, chain.verify).sweep()
+        finally:
+            chain.shutdown()
+
+    rejected = metrics.handshakes.value("rejected")
+    handler, closed = asyncio.run(run())
+    assert closed == 1 and handler.closed
+    assert metrics.handshakes.value("rejected") == rejected
+
+
+def test_sweep_groups_by_session_id():
+    checked = []
+
+    def authenticate(path, request_headers):
+        checked.append(request_headers["Cookie"])
+        return None
+
+    # the session id is extracted the same way as by the ubus method
+    authenticate.__module__ = ubus.__name__
+
+    async def run():
+        connections = Connections()
+        for cookie in ["foris.ws.session=abc", "lang=cs; foris.ws.session=abc", "foris.ws.session=x"]:
+            handler = FakeHandler()
+            handler.request_headers = Headers([("Cookie", cookie)])
+            await connections.register_connection(handler)
+
+        chain = AuthenticationChain([authenticate])
+        try:
+            revalidator = SessionRevalidator(
+                connections, chain.verify, session_key=chain.session_key
+            )
+            await revalidator.sweep()
+        finally:
+            chain.shutdown()
+
+    asyncio.run(run())
+    # tabs of one session are verified only once even though their cookies differ
+    assert len(checked) == 2
@@ -0,0 +1,73 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import os
+import time
+
+from cachelib.file import FileSystemCache
+from websockets.http import Headers
+
+from foris_ws.authentication import filesystem
+from foris_ws.authentication.filesystem import SessionStore
+
+
+def test_session_store(tmp_path):
+    fs_cache = FileSystemCache(str(tmp_path))
+    store = SessionStore(str(tmp_path))
+
+    assert store.get("first") is None
+
+    fs_cache.set("session:first", {"logged": True})
+    assert store.get("first") == {"logged": True}
+    assert store.get("first") == {"logged": True}
+    assert (store.hits, store.misses) == (1, 1)
+
+    # modification is detected
+    time.sleep(0.01)
+    fs_cache.set("session:first", {"logged": False})
+    assert store.get("first") == {"logged": False}
+
+    fs_cache.delete("session:first")
+    assert store.get("first") is None
+
+
+def test_session_store_max_age(tmp_path):
+    fs_cache = FileSystemCache(str(tmp_path))
+    store = SessionStore(str(tmp_path), max_age=0)
+
+    fs_cache.set("session:first", {"logged": True})
+    assert store.get("first") == {"logged": True}
+    assert store.get("first") == {"logged": True}
+    assert store.hits == 0
+
+
+def test_authenticate(tmp_path, monkeypatch):
+    monkeypatch.setattr(filesystem, "session_store", SessionStore(str(tmp_path)))
+    fs_cache = FileSystemCache(str(tmp_path))
+    fs_cache.set("session:logged", {"logged": True})
+    fs_cache.set("session:not-logged", {})
+
+    def authenticate(session_id):
+        return filesystem.authenticate("/", Headers([("Cookie", "session=%s" % session_id)]))
+
+    assert authenticate("logged") is None
+    assert authenticate("not-logged")[2] == b"Session not logged"
+    assert authenticate("missing")[2] == b"Session not found"
+    os.unlink(fs_cache._get_filename("session:logged"))
+    assert authenticate("logged")[2] == b"Session not found"
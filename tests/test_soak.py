@@ -0,0 +1,31 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+from foris_ws.soak import detect_growth
+
+
+def test_detect_growth():
+    # churn around a stable level
+    assert not detect_growth([10, 12, 11, 15, 10, 13, 11, 14, 10, 12, 11, 15])
+    # leaking one connection per sample
+    assert detect_growth([10 + i + (i % 3) * 2 for i in range(12)])
+    # too few samples
+    assert not detect_growth([1, 2, 3])
+    # small growth within tolerance
+    assert not detect_growth([1000, 1000, 1001, 1001, 1002, 1002, 1003, 1003])
@@ -0,0 +1,28 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+from benchmarks.startup import imported_modules
+
+# loaded only after the arguments are parsed (according to the chosen bus and authentication)
+HEAVY_MODULES = ["asyncio", "websockets", "foris_client", "paho", "ubus", "cachelib"]
+
+
+def test_no_heavy_imports():
+    loaded = {name.split(".")[0] for name in imported_modules()}
+    assert loaded.isdisjoint(HEAVY_MODULES)
@@ -0,0 +1,137 @@
+#
+# foris-ws
+# Copyright (C) 2026 CZ.NIC, z.s.p.o. (http://www.nic.cz/)
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301  USA
+#
+
+import io
+import json
+import subprocess
+import sys
+import types
+
+import pytest
+
+from foris_ws.authentication.ubus_client import UbusClientError, UbusSessionClient, serve
+
+# stub of the helper process which exits after answering two requests
+STUB_HELPER = """
+import json, sys
+for _ in range(2):
+    params = json.loads(sys.stdin.readline())
+    if params["ubus_rpc_session"] == "bad":
+        print(json.dumps({"error": "Not found"}), flush=True)
+    else:
+        print(json.dumps({"access": True}), flush=True)
+"""
+
+
+class StubClient(UbusSessionClient):
+    started = 0
+
+    def _start(self):
+        StubClient.started += 1
+        return subprocess.Popen(
+            [sys.executable, "-c", STUB_HELPER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+
+def test_persistent_client():
+    client = StubClient()
+    assert client.access({"ubus_rpc_session": "good"}) == {"access": True}
+    with pytest.raises(UbusClientError) as exc_info:
+        client.access({"ubus_rpc_session": "bad"})
+    assert not exc_info.value.unavailable
+    assert StubClient.started == 1
+
+    # helper exited -> it should be restarted
+    assert client.access({"ubus_rpc_session": "good"}) == {"access": True}
+    assert StubClient.started == 2
+
+
+class SilentClient(UbusSessionClient):
+    RESPONSE_TIMEOUT = 0.1
+
+    def _start(self):
+        return subprocess.Popen(
+            [sys.executable, "-c", "import sys; sys.stdin.read()"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+
+def test_helper_not_responding():
+    client = SilentClient()
+    with pytest.raises(UbusClientError) as exc_info:
+        client.access({"ubus_rpc_session": "good"})
+    # the state of the session is unknown
+    assert exc_info.value.unavailable
+
+
+class FakeUbus(types.ModuleType):
+    """ Fake python ubus binding which counts the connections
+    """
+
+    def __init__(self, failures):
+        super().__init__("ubus")
+        self.connected = False
+        self.connects = 0
+        self.failures = list(failures)  # errors raised by the next calls
+
+    def get_connected(self):
+        return self.connected
+
+    def connect(self, socket_path=None):
+        self.connected = True
+        self.connects += 1
+
+    def disconnect(self):
+        self.connected = False
+
+    def call(self, *args):
+        if self.failures:
+            raise RuntimeError(self.failures.pop(0))
+        return [{"access": True}]
+
+
+def run_helper(monkeypatch, capsys, fake_ubus, requests):
+    monkeypatch.setitem(sys.modules, "ubus", fake_ubus)
+    monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(e) + "\n" for e in requests)))
+    serve(None)
+    return [json.loads(e) for e in capsys.readouterr().out.splitlines()]
+
+
+def test_helper_denied_session(monkeypatch, capsys):
+    fake_ubus = FakeUbus(["ubus error occurred: Not found"])
+    responses = run_helper(monkeypatch, capsys, fake_ubus, [{"ubus_rpc_session": "bad"}] * 2)
+    assert responses == [{"error": "ubus error occurred: Not found"}, {"access": True}]
+    # denial is not a connection failure -> the connection is kept
+    assert fake_ubus.connects == 1
+
+
+def test_helper_reconnects(monkeypatch, capsys):
+    fake_ubus = FakeUbus(["ubus error occurred: Connection failed"])
+    responses = run_helper(monkeypatch, capsys, fake_ubus, [{"ubus_rpc_session": "good"}])
+    assert responses == [{"access": True}]
+    assert fake_ubus.connects == 2
+
+    fake_ubus = FakeUbus(["ubus error occurred: Connection failed"] * 2)
+    responses = run_helper(monkeypatch, capsys, fake_ubus, [{"ubus_rpc_session": "good"}])
+    assert responses[0]["unavailable"]